@@ -0,0 +1,241 @@
+"""Columnar in-memory copy of Accounting values for fast aggregates over whole ledger.
+
+Columns are kept in ``array`` module arrays, aggregates are vectorized with numpy
+if it is installed and computed by plain loops otherwise. Values are aggregated
+in base currency.
+"""
+import array
+import bisect
+from typing import Optional, Dict, Callable, Iterable, Tuple
+from .Rates import Rates
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NO_DAY = -2 ** 62
+
+
+class Analytics:
+    """Value, day, month, category and currency key columns of Accounting rows ordered by id.
+
+    Rows are patched on writes instead of reloading. Rows without valid date are only
+    included into balance of whole ledger, rows without category have category key 0,
+    rows in base currency have currency key 0.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, Optional[int], float, Optional[int], str]],
+                 month_of: Callable[[int], int], rates: Optional[Rates] = None) -> None:
+        """Load columns.
+
+        :param rows: rows of id, category key, value, days since epoch and currency
+            ordered by id.
+        :param month_of: function getting month number for day.
+        :param rates: exchange rates, values are taken as is if None.
+        """
+        self.month_of = month_of
+        self.months_of_days = {NO_DAY: NO_DAY}
+        self.currency_names = [""]
+        self.currency_keys = {"": 0}
+        self.rates = Rates([]) if rates is None else rates
+        self.amounts = None
+        rows = list(rows)
+        self.ids = array.array("q", [row[0] for row in rows])
+        self.categories = array.array("q", [row[1] or 0 for row in rows])
+        self.values = array.array("d", [row[2] for row in rows])
+        self.days = array.array("q", [NO_DAY if row[3] is None else row[3] for row in rows])
+        self.months = array.array("q", map(self.month, self.days))
+        self.currencies = array.array("q", [self.currency(row[4]) for row in rows])
+
+    def __len__(self) -> int:
+        """Get number of rows."""
+        return len(self.ids)
+
+    def month(self, day: int) -> int:
+        """Get month number for day, months of seen days are remembered.
+
+        :param day: days since epoch or NO_DAY.
+        """
+        if day not in self.months_of_days:
+            self.months_of_days[day] = self.month_of(day)
+        return self.months_of_days[day]
+
+    def currency(self, name: Optional[str]) -> int:
+        """Get key of currency, new currencies get next keys.
+
+        :param name: currency name, empty for base currency.
+        """
+        name = name or ""
+        if name not in self.currency_keys:
+            self.currency_keys[name] = len(self.currency_names)
+            self.currency_names.append(name)
+        return self.currency_keys[name]
+
+    def set_rates(self, rates: Rates) -> None:
+        """Replace exchange rates, converted values are recomputed on next use.
+
+        :param rates: exchange rates.
+        """
+        self.rates = rates
+        self.amounts = None
+
+    def append(self, row_id: int, category: Optional[int], value: float,
+               day: Optional[int], currency: str = "") -> None:
+        """Add row after the last one.
+
+        :param row_id: row id, greater than ids of all rows.
+        :param category: category key.
+        :param value: income if positive, expenses if negative.
+        :param day: days since epoch.
+        :param currency: currency name.
+        """
+        day = NO_DAY if day is None else day
+        self.amounts = None
+        self.ids.append(row_id)
+        self.categories.append(category or 0)
+        self.values.append(value)
+        self.days.append(day)
+        self.months.append(self.month(day))
+        self.currencies.append(self.currency(currency))
+
+    def update(self, row_id: int, category: Optional[int], value: float,
+               day: Optional[int], currency: str = "") -> None:
+        """Change row or add it if there is no row with such id.
+
+        :param row_id: row id.
+        :param category: category key.
+        :param value: income if positive, expenses if negative.
+        :param day: days since epoch.
+        :param currency: currency name.
+        """
+        position = bisect.bisect_left(self.ids, row_id)
+        if position == len(self.ids):
+            self.append(row_id, category, value, day, currency)
+            return
+        day = NO_DAY if day is None else day
+        self.amounts = None
+        if self.ids[position] != row_id:
+            for column, item in ((self.ids, row_id), (self.categories, category or 0),
+                                 (self.values, value), (self.days, day),
+                                 (self.months, self.month(day)),
+                                 (self.currencies, self.currency(currency))):
+                column.insert(position, item)
+            return
+        self.categories[position] = category or 0
+        self.values[position] = value
+        self.days[position] = day
+        self.months[position] = self.month(day)
+        self.currencies[position] = self.currency(currency)
+
+    def delete(self, row_id: int) -> None:
+        """Remove row if it exists.
+
+        :param row_id: row id.
+        """
+        position = bisect.bisect_left(self.ids, row_id)
+        if position < len(self.ids) and self.ids[position] == row_id:
+            self.amounts = None
+            for column in (self.ids, self.categories, self.values, self.days, self.months,
+                           self.currencies):
+                del column[position]
+
+    def converted(self):
+        """Get values converted to base currency as of their days, kept until next write.
+        Converted values are numpy array if numpy is installed.
+        """
+        if len(self.currency_names) == 1:
+            return self.values
+        if self.amounts is None:
+            if numpy is None:
+                names, rate = self.currency_names, self.rates.rate
+                self.amounts = array.array("d", [
+                    value * rate(names[key], day) if key else value
+                    for key, day, value in zip(self.currencies, self.days, self.values)])
+            else:
+                keys, days = self.column(self.currencies), self.column(self.days)
+                amounts = self.column(self.values).copy()
+                for key, name in enumerate(self.currency_names[1:], 1):
+                    mask = keys == key
+                    if mask.any():
+                        amounts[mask] = self.rates.convert(name, days[mask], amounts[mask])
+                self.amounts = amounts
+        return self.amounts
+
+    def by_category(self, start: int, end: int) -> Dict[int, Tuple[float, float]]:
+        """Get income and expenses of each category over period.
+
+        :param start: first day of period.
+        :param end: last day of period.
+        """
+        return self.totals(self.days, self.categories, start, end)
+
+    def by_month(self, start: int, end: int) -> Dict[int, Tuple[float, float]]:
+        """Get income and expenses of each month over period.
+
+        :param start: first day of period.
+        :param end: last day of period.
+        """
+        return self.totals(self.days, self.months, start, end)
+
+    def balance(self, end: Optional[int] = None) -> float:
+        """Get sum of values of rows till day, of all rows if day is None.
+        Sum of each currency is converted as of that day, by the last rate if day is None.
+
+        :param end: last day.
+        """
+        if numpy is None:
+            sums = [0.0] * len(self.currency_names)
+            for key, day, value in zip(self.currencies, self.days, self.values):
+                if end is None or NO_DAY < day <= end:
+                    sums[key] += value
+        else:
+            keys, values = self.column(self.currencies), self.column(self.values)
+            if end is not None:
+                days = self.column(self.days)
+                mask = (days > NO_DAY) & (days <= end)
+                keys, values = keys[mask], values[mask]
+            sums = numpy.bincount(keys, values, minlength=len(self.currency_names)).tolist()
+        return sum(total * self.rates.rate(name, end)
+                   for name, total in zip(self.currency_names, sums))
+
+    def totals(self, days: array.array, keys: array.array, start: int, end: int
+               ) -> Dict[int, Tuple[float, float]]:
+        """Get income and expenses of rows within period grouped by key column.
+
+        :param days: day column.
+        :param keys: grouping column.
+        :param start: first day of period.
+        :param end: last day of period.
+        """
+        result = {}
+        if numpy is None:
+            for day, key, value in zip(days, keys, self.converted()):
+                if start <= day <= end and value:
+                    totals = result.setdefault(key, [0.0, 0.0])
+                    totals[value < 0] += abs(value)
+            return {key: (income, expenses) for key, (income, expenses) in result.items()}
+        if not self.ids:
+            return result
+        days = self.column(days)
+        mask = (days >= max(start, NO_DAY + 1)) & (days <= end)
+        keys, values = self.column(keys)[mask], self.column(self.converted())[mask]
+        if not len(keys):
+            return result
+        first = int(keys.min())
+        keys = keys - first
+        income = numpy.bincount(keys, numpy.where(values > 0, values, 0.0))
+        expenses = numpy.bincount(keys, numpy.where(values < 0, -values, 0.0))
+        for key in numpy.flatnonzero((income != 0) | (expenses != 0)).tolist():
+            result[key + first] = float(income[key]), float(expenses[key])
+        return result
+
+    @staticmethod
+    def column(column):
+        """Get numpy view of column without copying.
+
+        :param column: array of column or numpy array.
+        """
+        if isinstance(column, numpy.ndarray):
+            return column
+        return numpy.frombuffer(column, dtype=column.typecode)
@@ -0,0 +1,43 @@
+"""Compact batch of rows passed from Model to View."""
+from typing import Optional, Iterable, Iterator, Tuple, Union
+
+
+class Batch:
+    """Row-major batch of database rows with message metadata.
+
+    Rows are kept as tuples returned by sqlite3, so no object is allocated per cell.
+    Rows may be an unread cursor, then they are streamed to View without materializing.
+    """
+
+    __slots__ = ("op", "columns", "rows", "total", "offset")
+
+    def __init__(self, op: str, columns: Tuple[str, ...],
+                 rows: Iterable[Tuple[Union[int, float, str, None], ...]],
+                 total: Optional[int] = None, offset: int = 0) -> None:
+        """Store rows and metadata.
+
+        :param op: message operation, e.g. "page", "changed", "appended" or "deleted".
+        :param columns: names of row columns.
+        :param rows: rows tuples or cursor.
+        :param total: number of rows in the whole table.
+        :param offset: position of first row in the whole table.
+        """
+        self.op = op
+        self.columns = columns
+        self.rows = rows
+        self.total = total
+        self.offset = offset
+
+    def __iter__(self) -> Iterator[Tuple[Union[int, float, str, None], ...]]:
+        """Iterate over rows."""
+        return iter(self.rows)
+
+    def __repr__(self) -> str:
+        """Show batch metadata."""
+        return f"Batch({self.op!r}, {self.columns!r}, total={self.total}, offset={self.offset})"
+
+    def materialize(self) -> "Batch":
+        """Read streamed rows into list, so batch may be iterated more than once."""
+        if not isinstance(self.rows, list):
+            self.rows = list(self.rows)
+        return self
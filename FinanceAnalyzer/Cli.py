@@ -0,0 +1,123 @@
+"""Command line interface, starts GUI if no command is given."""
+import sys
+import csv
+import argparse
+from typing import Optional, List
+
+
+def parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    """Parse command line arguments.
+
+    :param argv: arguments without program name.
+    """
+    parser = argparse.ArgumentParser(prog="FinanceAnalyzer",
+                                     description="Simple finance manager application.")
+    parser.add_argument("--db", default="~/FinanceAnalyzer.db", help="path to database")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="write durations of processed events to JSON file on exit")
+    commands = parser.add_subparsers(dest="command")
+    query = commands.add_parser("query", help="print accounting rows")
+    query.add_argument("--start", type=int, help="id of first row")
+    query.add_argument("--count", type=int, default=30, help="number of rows")
+    query.add_argument("--search", help="print only rows with comment or category words "
+                                        "starting with these words")
+    add = commands.add_parser("add", help="add accounting row")
+    for name in "comment", "category", "value", "date":
+        add.add_argument(name)
+    add.add_argument("--currency", default="", help="row currency, base currency by default")
+    statement = commands.add_parser("import", help="import CSV, OFX or QIF bank statement")
+    statement.add_argument("path")
+    statement.add_argument("--currency", default="",
+                           help="statement currency, base currency by default")
+    rate = commands.add_parser("rate", help="set exchange rate of currency to base one from date")
+    rate.add_argument("currency")
+    rate.add_argument("date", help="first date of rate")
+    rate.add_argument("rate", help="price of currency unit in base currency")
+    archive = commands.add_parser("archive", help="move rows of closed year into separate "
+                                                  "database, attached only when year is needed")
+    archive.add_argument("year", type=int)
+    report = commands.add_parser("report", help="print income and expenses over period")
+    report.add_argument("start", help="first date of period")
+    report.add_argument("end", help="last date of period")
+    report.add_argument("--output", metavar="PATH", help="write report to file instead")
+    report.add_argument("--format", choices=("csv", "jsonl"),
+                        help="output file format, guessed by file suffix by default")
+    export = commands.add_parser("export", help="write accounting rows to CSV or JSON Lines file")
+    export.add_argument("path")
+    export.add_argument("--format", choices=("csv", "jsonl"),
+                        help="file format, guessed by file suffix by default")
+    export.add_argument("--start", help="first date of rows")
+    export.add_argument("--end", help="last date of rows")
+    export.add_argument("--category", help="category of rows, rows without category if empty")
+    export.add_argument("--comment", help="text contained in comments of rows")
+    commands.add_parser("goals", help="print goals with saved sums")
+    goal = commands.add_parser("goal", help="add goal")
+    goal.add_argument("name")
+    goal.add_argument("price")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run command or start application.
+
+    :param argv: arguments without program name, sys.argv is used if None.
+    """
+    args = parse_args(argv)
+    if args.command is None:
+        from .Controller import main as gui
+        gui(args.db, args.trace)
+        return
+    from .Headless import Headless
+    from .Trace import Tracer
+    tracer = Tracer() if args.trace else None
+    ledger = Headless(args.db, tracer=tracer)
+    try:
+        if args.command == "query":
+            for row in ledger.query(args.start, args.count, args.search):
+                print(*(row if row[5] else row[:5]), sep="\t")
+        elif args.command == "add":
+            print(ledger.add(args.comment, args.category, args.value, args.date, args.currency))
+        elif args.command == "import":
+            try:
+                print(ledger.import_file(args.path, currency=args.currency))
+            except (OSError, ValueError, csv.Error) as error:
+                sys.exit(str(error))
+        elif args.command == "rate":
+            try:
+                ledger.set_rate(args.currency, args.date, args.rate)
+            except ValueError as error:
+                sys.exit(str(error))
+        elif args.command == "archive":
+            try:
+                print(ledger.archive(args.year))
+            except ValueError as error:
+                sys.exit(str(error))
+        elif args.command == "report" and args.output:
+            try:
+                print(ledger.export_report(args.output, args.start, args.end, args.format))
+            except ValueError as error:
+                sys.exit(str(error))
+        elif args.command == "report":
+            try:
+                rows = ledger.report(args.start, args.end)
+            except ValueError as error:
+                sys.exit(str(error))
+            for category, income, expenses in rows:
+                print(category, f"{income:.2f}", f"{expenses:.2f}", sep="\t")
+            print("Total", f"{sum(row[1] for row in rows):.2f}",
+                  f"{sum(row[2] for row in rows):.2f}", sep="\t")
+        elif args.command == "export":
+            try:
+                print(ledger.export(args.path, args.format, args.start, args.end, args.category,
+                                    args.comment))
+            except ValueError as error:
+                sys.exit(str(error))
+        elif args.command == "goals":
+            for goal_id, name, price, saved in ledger.goals():
+                print(goal_id, name, f"{price:.2f}", f"{saved:.2f}", sep="\t")
+        elif args.command == "goal":
+            print(ledger.add_goal(args.name, args.price))
+    finally:
+        ledger.close()
+        if tracer:
+            tracer.export(args.trace)
@@ -1,17 +1,24 @@
 """MVC Controller part of application."""
+import time
 import tkinter as tk
-from . import View, Model
+from . import View, Model, Worker
+from .Batch import Batch
+from .Trace import Tracer
 from typing import Optional, Dict, Union, Iterable
 
 
 class Controller:
     """MVC Controller class."""
 
-    def __init__(self, title: str, dbpath: str = "~/FinanceAnalyzer.db") -> None:
+    def __init__(self, title: str, dbpath: str = "~/FinanceAnalyzer.db",
+                 threaded: bool = False, tracer: Optional[Tracer] = None) -> None:
         """Create View and Model instances.
         Model and View communicate via callbacks.
 
         :param title: application title.
+        :param dbpath: path to database.
+        :param threaded: run Model in background thread and poll its results.
+        :param tracer: tracer of event durations, events are not timed if None.
         """
         self.main_window = tk.Frame()
         self.main_window.master.geometry("1280x720")
@@ -22,27 +29,77 @@ class Controller:
         self.main_window.rowconfigure(0, weight=1)
         self.main_window.grid(sticky="NEWS")
         self.view = View.View(self.main_window, self.pass_event_to_model)
-        self.model = Model.Model(self.draw_view, dbpath)
+        self.poll_interval = 20
+        self.tracer = tracer
+        if threaded:
+            self.model = None
+            self.worker = Worker.Worker(dbpath, tracer=tracer)
+            self.worker.start()
+        else:
+            self.model = Model.Model(self.draw_view, dbpath, tracer=tracer)
+            self.worker = None
         self.window = "window_main"
 
     def __call__(self) -> None:
         """Initialize communications between Model and View."""
         self.pass_event_to_model({"type": "start_setup", "data": None})
+        if self.worker:
+            self.poll_results()
+        else:
+            self.flush_model()
         self.main_window.master.mainloop()
+        if self.worker:
+            self.worker.stop()
+        else:
+            self.model.flush()
 
     def pass_event_to_model(self, event: Dict[str, Optional[Union[str, int]]] = None) -> None:
         """Pass data to Model."""
-        self.model(self.window, event)
+        if self.worker:
+            self.worker.submit(self.window, event)
+        else:
+            self.model(self.window, event)
+
+    def flush_model(self) -> None:
+        """Commit Model writes older than commit interval and schedule next check."""
+        self.model.flush(force=False)
+        self.main_window.after(int(self.model.commit_interval * 1000), self.flush_model)
+
+    def poll_results(self) -> None:
+        """Draw results of background Model and schedule next poll."""
+        while not self.worker.results.empty():
+            self.draw_view(*self.worker.results.get())
+        self.main_window.after(self.poll_interval, self.poll_results)
 
     def draw_view(self, window: str,
-                  data: Optional[Union[Iterable[Dict[str, Union[int, str, float]]],
-                                       Dict[str, str]]]) -> None:
-        """Pass data to View."""
-        self.window = window
-        self.view(window, data)
+                  data: Optional[Union[Iterable[Batch], Batch, Dict[str, str]]],
+                  event_type: Optional[str] = None, show: bool = True) -> None:
+        """Pass data to View.
+
+        :param window: window to draw.
+        :param data: data to draw.
+        :param event_type: type of event, which result is drawn, used if events are timed.
+        :param show: switch to window, shown window is kept for results of read-only events.
+        """
+        if show:
+            self.window = window
+        if self.tracer is None:
+            self.view(window, data, show)
+            return
+        start = time.perf_counter()
+        widgets = self.view(window, data, show)
+        self.tracer.record(event_type, "draw", time.perf_counter() - start, widgets=widgets)
+
 
+def main(dbpath: str = "~/FinanceAnalyzer.db", trace: Optional[str] = None):
+    """Start application.
 
-def main():
-    """Start application."""
-    controller = Controller(title="FinanceAnalyzer", dbpath="~/FinanceAnalyzer.db")
+    :param dbpath: path to database.
+    :param trace: path to file, to which event durations are written on exit.
+    """
+    tracer = Tracer() if trace else None
+    controller = Controller(title="FinanceAnalyzer", dbpath=dbpath, threaded=True,
+                            tracer=tracer)
     controller()
+    if tracer:
+        tracer.export(trace)
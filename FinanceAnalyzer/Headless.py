@@ -0,0 +1,142 @@
+"""Model facade for scripts and batch jobs, does not need tkinter."""
+from typing import Optional, Dict, Union, Callable, Iterable, List, Tuple
+from . import Model
+from .Batch import Batch
+
+
+class Headless:
+    """Call Model events and return their results instead of drawing them."""
+
+    def __init__(self, dbpath: str = "~/FinanceAnalyzer.db", **options) -> None:
+        """Open database and create tables if needed.
+
+        :param dbpath: path to database.
+        :param options: Model options.
+        """
+        self.results = []
+        self.model = Model.Model(lambda window, data, event_type=None: self.results.append(data),
+                                 dbpath, **options)
+        self("start_setup")
+
+    def __call__(self, event_type: str, **event) -> Optional[Union[Iterable[Batch], Batch,
+                                                                   Dict[str, str]]]:
+        """Process event by Model and return its result.
+
+        :param event_type: Model event type.
+        :param event: event data.
+        """
+        self.results.clear()
+        self.model("headless", dict(event, type=event_type))
+        return self.results[-1]
+
+    def close(self) -> None:
+        """Commit changes and close database."""
+        self.model.close()
+
+    def query(self, start: Optional[int] = None, count: int = 30, search: Optional[str] = None
+              ) -> List[Tuple[int, str, str, float, str, str]]:
+        """Get page of Accounting rows with id, comment, category, value, date and currency.
+
+        :param start: id of first row, from table beginning if None.
+        :param count: number of rows.
+        :param search: words, which comment or category words of rows start with.
+        """
+        [page] = self("accounting_page", start=start, count=count, query=search)
+        return list(page)
+
+    def add(self, comment: str, category: str, value: Union[str, float], date: str,
+            currency: str = "") -> int:
+        """Add Accounting row and return its id.
+
+        :param comment: row comment.
+        :param category: row category.
+        :param value: income if positive, expenses if negative.
+        :param date: row date.
+        :param currency: row currency, empty for base currency.
+        """
+        changed = self("accounting_add_row", comment=comment, category=category, value=value,
+                       date=date, currency=currency)[0]
+        return next(iter(changed))[0]
+
+    def import_file(self, path: str, progress: Optional[Callable[[int], None]] = None,
+                    currency: str = "") -> int:
+        """Import bank statement and return number of imported rows.
+
+        :param path: path to statement.
+        :param progress: callback called with number of imported rows after each batch.
+        :param currency: statement currency, empty for base currency.
+        """
+        return self.model.import_file(path, progress, currency=currency)
+
+    def set_rate(self, currency: str, date: str, rate: Union[str, float]) -> None:
+        """Set exchange rate of currency to base one from date.
+
+        :param currency: currency name.
+        :param date: first date of rate.
+        :param rate: price of currency unit in base currency.
+        """
+        if self("rates_update_row", currency=currency, date=date, rate=rate) is not None:
+            raise ValueError(f"Invalid rate: {currency} {date} {rate}")
+
+    def archive(self, year: int) -> int:
+        """Move rows of closed year into separate database and return their number.
+
+        :param year: year before current one.
+        """
+        return self.model.archive_year(year)
+
+    def report(self, start: str, end: str) -> List[Tuple[str, float, float]]:
+        """Get income and expenses of each category over period.
+
+        :param start: first date of period.
+        :param end: last date of period.
+        """
+        report = self("report_query", start=start, end=end)
+        if report.op == "invalid":
+            raise ValueError(f"Invalid period: {start} - {end}")
+        return list(report)
+
+    def goals(self) -> List[Tuple[int, str, float, float]]:
+        """Get goals with savings allocated to them."""
+        return list(self("goals_navigation"))
+
+    def add_goal(self, name: str, price: Union[str, float]) -> int:
+        """Add goal and return its id.
+
+        :param name: goal name.
+        :param price: goal price.
+        """
+        return list(self("goals_update_row", id=None, name=name, price=price))[-1][0]
+
+    def export(self, path: str, file_format: Optional[str] = None, start: Optional[str] = None,
+               end: Optional[str] = None, category: Optional[str] = None,
+               comment: Optional[str] = None) -> int:
+        """Stream Accounting rows to CSV or JSON Lines file and return their number.
+
+        :param path: path to output file.
+        :param file_format: "csv" or "jsonl", guessed by file suffix if None.
+        :param start: first date of rows.
+        :param end: last date of rows.
+        :param category: category of rows, rows without category if empty.
+        :param comment: text contained in comments of rows.
+        """
+        [exported] = self("accounting_export", path=path, format=file_format, start=start,
+                          end=end, category=category, comment=comment)
+        if exported.op == "invalid":
+            raise ValueError(f"Invalid period: {start} - {end}")
+        return next(iter(exported))[0]
+
+    def export_report(self, path: str, start: str, end: str,
+                      file_format: Optional[str] = None) -> int:
+        """Write income and expenses of each category over period to file.
+        Return number of written categories.
+
+        :param path: path to output file.
+        :param start: first date of period.
+        :param end: last date of period.
+        :param file_format: "csv" or "jsonl", guessed by file suffix if None.
+        """
+        exported = self("report_export", path=path, format=file_format, start=start, end=end)
+        if exported.op == "invalid":
+            raise ValueError(f"Invalid period: {start} - {end}")
+        return next(iter(exported))[0]
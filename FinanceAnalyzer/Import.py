@@ -0,0 +1,185 @@
+"""Streaming readers of bank statements in CSV, OFX and QIF formats."""
+import os
+import re
+import csv
+import datetime
+from typing import Optional, Union, Callable, Iterable, Iterator, Tuple
+
+Record = Tuple[str, str, Optional[Union[str, float]], Union[str, datetime.date]]
+
+CSV_COLUMNS = {"date": ("date", "posted", "дата"),
+               "debit": ("debit", "расход", "списание"),
+               "credit": ("credit", "доход", "зачисление"),
+               "value": ("amount", "value", "sum", "сумма"),
+               "comment": ("description", "comment", "memo", "payee", "name", "комментарий",
+                           "описание"),
+               "category": ("category", "категория")}
+
+
+def read_csv(path: str) -> Iterator[Record]:
+    """Read records of CSV statement with header row.
+    Columns are found by header names, delimiter is detected from file beginning.
+    Names equal to aliases are matched first, then names containing them, each header
+    column is taken once. Debit and credit are matched before value, so "Debit Amount"
+    is not taken for amount. Rows with empty debit and credit are skipped.
+
+    :param path: path to statement.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as statement:
+        try:
+            dialect = csv.Sniffer().sniff(statement.read(4096), delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        statement.seek(0)
+        reader = csv.reader(statement, dialect)
+        header = [name.strip().lower() for name in next(reader, [])]
+        columns = {}
+        for exact in True, False:
+            for column, aliases in CSV_COLUMNS.items():
+                for idx, name in enumerate(header):
+                    if column in columns or idx in columns.values():
+                        continue
+                    if name in aliases if exact else any(alias in name for alias in aliases):
+                        columns[column] = idx
+        width = max(columns.values(), default=-1) + 1
+        comment, category, date = (columns.get(name, width)
+                                   for name in ("comment", "category", "date"))
+        for row in reader:
+            if len(row) <= width:
+                row += [""] * (width + 1 - len(row))
+            if "value" in columns:
+                value = row[columns["value"]]
+            else:
+                credit, debit = (row[columns.get(name, width)].strip()
+                                 for name in ("credit", "debit"))
+                try:
+                    value = (parse_amount(credit) - abs(parse_amount(debit))
+                             if credit or debit else None)
+                except ValueError:
+                    value = None
+            yield row[comment], row[category], value, row[date]
+
+
+def read_ofx(path: str, chunk_size: int = 1 << 16) -> Iterator[Record]:
+    """Read transactions of OFX statement, both SGML and XML flavours.
+
+    :param path: path to statement.
+    :param chunk_size: size of text read at once.
+    """
+    transaction = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.S | re.I)
+    tag = re.compile(r"<(\w+)>([^<\r\n]*)")
+    with open(path, encoding="utf-8", errors="replace") as statement:
+        buffer = ""
+        for chunk in iter(lambda: statement.read(chunk_size), ""):
+            buffer += chunk
+            end = 0
+            for match in transaction.finditer(buffer):
+                fields = {name.upper(): value.strip() for name, value in tag.findall(match[1])}
+                date = fields.get("DTPOSTED", "")[:8]
+                if date.isdigit() and len(date) == 8:
+                    date = make_date(int(date[:4]), int(date[4:6]), int(date[6:]))
+                yield (fields.get("MEMO") or fields.get("NAME", ""), "", fields.get("TRNAMT", ""),
+                       date)
+                end = match.end()
+            buffer = buffer[end:]
+
+
+def read_qif(path: str) -> Iterator[Record]:
+    """Read transactions of QIF statement.
+
+    :param path: path to statement.
+    """
+    qif_date = re.compile(r"(\d+)/\s*(\d+)['/]\s*(\d+)")
+    with open(path, encoding="utf-8", errors="replace") as statement:
+        fields = {}
+        for line in statement:
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("!"):
+                continue
+            if line[0] != "^":
+                fields[line[0]] = line[1:].strip()
+                continue
+            date = fields.get("D", "")
+            match = qif_date.fullmatch(date)
+            if match:
+                month, day, year = map(int, match.groups())
+                date = make_date(year + 2000 if year < 100 else year, month, day)
+            yield (fields.get("M") or fields.get("P", ""), fields.get("L", ""),
+                   fields.get("T", "").replace(",", ""), date)
+            fields = {}
+
+
+def make_date(year: int, month: int, day: int) -> Union[datetime.date, str]:
+    """Create date, invalid date is returned as empty text.
+
+    :param year: year.
+    :param month: month.
+    :param day: day of month.
+    """
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        return ""
+
+
+def read_statement(path: str) -> Iterator[Record]:
+    """Read records of statement choosing reader by file extension.
+
+    :param path: path to statement.
+    """
+    readers = {".csv": read_csv, ".ofx": read_ofx, ".qfx": read_ofx, ".qif": read_qif}
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in readers:
+        raise ValueError(f"Unsupported statement format: {extension}")
+    return readers[extension](path)
+
+
+def parse_amount(amount: Optional[Union[str, float]]) -> float:
+    """Convert amount text like "1 234,56" or "(12.00)" to number.
+
+    :param amount: amount text.
+    """
+    if isinstance(amount, (int, float)):
+        return float(amount)
+    try:
+        return float(amount)
+    except (TypeError, ValueError):
+        pass
+    amount = re.sub(r"\s", "", amount or "")
+    if amount.startswith("(") and amount.endswith(")"):
+        amount = "-" + amount[1:-1]
+    if "," in amount and "." in amount:
+        thousands = "," if amount.rindex(",") < amount.rindex(".") else "."
+        amount = amount.replace(thousands, "").replace(",", ".")
+    elif amount.count(",") == 1 and len(amount.split(",")[1]) != 3:
+        amount = amount.replace(",", ".")
+    else:
+        amount = amount.replace(",", "")
+    return float(amount) if amount else 0.0
+
+
+def normalize(records: Iterable[Record], parse_date: Callable[[str], Optional[int]]
+              ) -> Iterator[Tuple[str, str, float, str, int]]:
+    """Validate records and convert them to Accounting row values.
+    Records without valid date or amount are skipped, empty amount is not valid.
+
+    :param records: statement records.
+    :param parse_date: converter of date text to days since epoch.
+    """
+    epoch = datetime.date(1970, 1, 1).toordinal()
+    dates = {}
+    for comment, category, value, date in records:
+        if value is None or isinstance(value, str) and not value.strip():
+            continue
+        try:
+            value = parse_amount(value)
+        except ValueError:
+            continue
+        if date not in dates:
+            if len(dates) > 10000:
+                dates.clear()
+            day = date.toordinal() - epoch if isinstance(date, datetime.date) else parse_date(date)
+            dates[date] = None if day is None else (datetime.date.fromordinal(day + epoch)
+                                                    .isoformat(), day)
+        if dates[date] is not None:
+            yield (comment.strip(), category.strip(), value, *dates[date])
@@ -1,31 +1,245 @@
 """MVC Model part of application."""
 import os
+import re
+import csv
+import sys
+import json
+import time
 import sqlite3
-from typing import Optional, Dict, Union, Callable, Iterable, Tuple
+import bisect
+import datetime
+import itertools
+import contextlib
+from collections import OrderedDict
+from typing import (Optional, Dict, Union, Callable, Iterable, Iterator, List, Tuple,
+                    TYPE_CHECKING)
+from . import Import
+from .Batch import Batch
+from .Pool import ReaderPool, read_only_uri
+from .Trace import Tracer, TimedCursor
+
+if TYPE_CHECKING:
+    from .Analytics import Analytics
+    from .Rates import Rates
 
 
 class Model:
     """MVC Model class."""
 
     def __init__(self, callback: Callable[[str, Optional[
-            Union[Iterable[Dict[str, Union[int, str, float]]], Dict[str, str]]]], None],
-            dbpath: str) -> None:
+            Union[Iterable[Batch], Batch, Dict[str, str]]]], None],
+            dbpath: str, commit_interval: float = 1.0, commit_ops: int = 100,
+            synchronous: str = "NORMAL", tracer: Optional[Tracer] = None,
+            analytics: bool = False, cache_size: int = 4 * 2 ** 20, readers: int = 2,
+            mmap_size: int = 2 ** 28, workers: int = 0) -> None:
         """Open database.
+        Writes are grouped into transactions, committed when ``commit_interval`` seconds
+        passed since first uncommitted write or ``commit_ops`` writes were made.
+        Results of repeated reads are kept in cache of about ``cache_size`` bytes.
+        Report, search and export queries run on pool of ``readers`` read-only connections,
+        on writer connection if it is 0 or database is in memory.
+        Reports over at least ``parallel_days`` spanning archived years may be aggregated
+        by ``workers`` processes.
 
         :param callback: callback passed by Controller.
+        :param dbpath: path to database.
+        :param commit_interval: maximum age of uncommitted writes in seconds.
+        :param commit_ops: maximum number of uncommitted writes.
+        :param synchronous: sqlite synchronous mode, "OFF", "NORMAL" or "FULL".
+        :param tracer: tracer of event durations, events are not timed if None.
+        :param analytics: keep columnar copy of ledger in memory for reports.
+        :param cache_size: memory budget of query result cache in bytes.
+        :param readers: maximum number of read-only connections.
+        :param mmap_size: bytes of database memory-mapped by each read-only connection.
+        :param workers: number of report worker processes, reports are serial if less than 2.
         """
         self.callback = callback
+        self.tracer = tracer
+        self.event_type = None
         self.windows = {"window_accounting", "window_settings"}
         self.settings_set = {"Background color", "Text color", "Font"}
-        self.initial_call = {w: True for w in self.windows}
-        self.con = sqlite3.connect(os.path.expanduser(dbpath))
+        self.shown_window = None
+        self.dbpath = os.path.expanduser(dbpath)
+        self.con = sqlite3.connect(self.dbpath, uri=True)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute(f"PRAGMA synchronous={synchronous}")
         self.cur = self.con.cursor()
-        self.num_records_start = 20
+        self.readers = (ReaderPool(self.dbpath, readers, mmap_size)
+                        if readers and self.dbpath != ":memory:" else None)
+        self.commit_interval = commit_interval
+        self.commit_ops = commit_ops
+        self.pending_ops = 0
+        self.pending_since = 0.0
+        self.page_size = 30
+        self.export_batch = 1000
+        self.total_rows = None
+        self.superseded = None
+        self.table_versions = {"ACCOUNTING": 0, "CATEGORIES": 0, "SETTINGS": 0, "GOALS": 0,
+                               "RATES": 0}
+        self.data_version = None
+        self.result_cache = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.sql_seconds = 0.0
+        self.fts_source = ("SELECT rowid FROM ACCOUNTING_FTS WHERE ACCOUNTING_FTS MATCH :match",
+                           "rowid")
+        self.fts_insert = ("INSERT INTO ACCOUNTING_FTS(rowid, comment, category) "
+                           "SELECT new.id, new.comment, IFNULL((SELECT name FROM CATEGORIES "
+                           "WHERE category_id = new.category_id), '') "
+                           "WHERE new.comment != '' OR new.category_id IS NOT NULL;")
+        self.like_source = ("SELECT id FROM ACCOUNTING LEFT JOIN CATEGORIES USING (category_id) "
+                            "WHERE (comment LIKE :match ESCAPE '\\' "
+                            "OR name LIKE :match ESCAPE '\\')", "id")
+        self.search_source = self.like_source
+        self.accounting_columns = ("id", "comment", "category", "value", "date", "currency")
+        self.report_columns = ("category", "income", "expenses")
+        self.goal_columns = ("id", "name", "price", "saved")
+        self.balances = None
+        self.exchange_rates = None
+        self.date_formats = ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y", "%d.%m.%y")
+        self.accounting_select = ("SELECT id, comment, IFNULL(name, ''), value, date, currency "
+                                  "FROM ACCOUNTING LEFT JOIN CATEGORIES USING (category_id)")
+        self.accounting_insert = ("INSERT INTO ACCOUNTING "
+                                  "(id, comment, category_id, value, date, day, currency) "
+                                  "VALUES (?, ?, ?, ?, ?, ?, ?)")
+        self.category_ids = None
+        self.category_keys = []
+        self.next_id_select = ("SELECT MAX(id) + 1 FROM (SELECT MAX(id) AS id FROM ACCOUNTING "
+                               "UNION ALL SELECT MAX(last_id) FROM PARTITIONS)")
+        self.partitions = None
+        self.attached: Dict[sqlite3.Connection, OrderedDict] = {}
+        self.attach_limit = (self.con.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+                             if hasattr(self.con, "getlimit") else 10)
+        self.analytics_enabled = analytics
+        self.analytics = None
+        self.workers = workers
+        self.parallel_days = 366
+        self.executor = None
 
     def __del__(self) -> None:
         """Commit changes and close database."""
-        self.con.commit()
-        self.con.close()
+        self.close()
+
+    def close(self) -> None:
+        """Commit changes and close database."""
+        if getattr(self, "con", None) is not None:
+            self.flush()
+            if self.readers is not None:
+                self.readers.close()
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+            self.con.close()
+            self.con = None
+
+    def written(self, ops: int = 1, tables: Iterable[str] = ("ACCOUNTING", )) -> None:
+        """Account writes made in current transaction and commit it if window is full.
+        Versions of written tables are bumped, so cached results of their reads are stale.
+
+        :param ops: number of writes.
+        :param tables: written tables.
+        """
+        for table in tables:
+            self.table_versions[table] += 1
+        if not self.pending_ops:
+            self.pending_since = time.monotonic()
+        self.pending_ops += ops
+        self.flush(force=False)
+
+    def flush(self, force: bool = True) -> None:
+        """Commit current transaction.
+
+        :param force: commit even if neither time nor writes number window is full.
+        """
+        expired = time.monotonic() - self.pending_since >= self.commit_interval
+        full = self.pending_ops and (expired or self.pending_ops >= self.commit_ops)
+        if full or force and self.con.in_transaction:
+            self.con.commit()
+            self.pending_ops = 0
+
+    @contextlib.contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Take read-only connection from pool, writer connection if pool is disabled.
+        Current transaction is committed first, so reader sees its writes.
+        """
+        self.flush()
+        if self.readers is None:
+            yield self.con
+            return
+        with self.readers.connection() as con:
+            yield con
+
+    def select(self, sql: str, params: Union[Tuple, Dict] = (),
+               tables: Iterable[str] = ("ACCOUNTING", "CATEGORIES"),
+               con: Optional[sqlite3.Connection] = None) -> List[Tuple]:
+        """Run read query or take its rows from result cache.
+        Cached rows are used while versions of read tables are unchanged
+        and no other connection committed to database. Rows must not be modified.
+        Size of rows is estimated by the first one.
+
+        :param sql: query.
+        :param params: query parameters.
+        :param tables: tables read by query.
+        :param con: connection running query, shared cursor of writer if None.
+        """
+        self.refresh()
+        key = sql, tuple(sorted(params.items()) if isinstance(params, dict) else params)
+        versions = tuple(self.table_versions[table] for table in tables)
+        entry = self.result_cache.pop(key, None)
+        if entry is not None:
+            self.cache_bytes -= entry[2]
+            if entry[0] == versions:
+                self.cache_hits += 1
+                self.result_cache[key] = entry
+                self.cache_bytes += entry[2]
+                return entry[1]
+        self.cache_misses += 1
+        rows = self.cursor(con).execute(sql, params).fetchall()
+        row_size = sys.getsizeof(rows[0]) + sum(map(sys.getsizeof, rows[0])) if rows else 0
+        size = sys.getsizeof(rows) + len(rows) * row_size
+        self.result_cache[key] = versions, rows, size
+        self.cache_bytes += size
+        while self.cache_bytes > self.cache_size:
+            self.cache_bytes -= self.result_cache.popitem(last=False)[1][2]
+        return rows
+
+    def cursor(self, con: Optional[sqlite3.Connection] = None) -> sqlite3.Cursor:
+        """Get cursor of connection, timed one if events are timed.
+
+        :param con: connection, shared cursor of writer is returned if None.
+        """
+        if con is None:
+            return self.cur
+        if self.tracer is None:
+            return con.cursor()
+        cursor = con.cursor(TimedCursor)
+        cursor.timer = self
+        return cursor
+
+    def refresh(self) -> None:
+        """Drop cached results and values read once per session if database was changed.
+        Data version changes when another connection commits, so it is checked per event.
+        """
+        data_version = self.cur.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return
+        if self.data_version is not None:
+            self.total_rows = None
+            self.category_ids = None
+            self.partitions = None
+            self.balances = None
+            self.exchange_rates = None
+            self.analytics = None
+        self.data_version = data_version
+        self.result_cache.clear()
+        self.cache_bytes = 0
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Get hits, misses, number of entries and size in bytes of query result cache."""
+        return {"hits": self.cache_hits, "misses": self.cache_misses,
+                "entries": len(self.result_cache), "bytes": self.cache_bytes}
 
     def __call__(self, window: str, event: Dict[str, Optional[Union[str, int]]]) -> None:
         """Process event and pass data to Controller.
@@ -34,8 +248,36 @@ class Model:
         :param event: occurred event data.
         """
         assert self.validate_args(window, event)
+        self.refresh()
+        self.event_type = event["type"]
+        if self.tracer is None:
+            window, data = self.process_event(event)
+            self.callback(window, data)
+            return
+        if not isinstance(self.cur, TimedCursor):
+            self.cur = self.cursor(self.con)
+        start = time.perf_counter()
+        self.sql_seconds = 0.0
         window, data = self.process_event(event)
-        self.callback(window, data)
+        rows = sum(len(batch.materialize().rows) for batch in
+                   (data if isinstance(data, list) else [data] if isinstance(data, Batch) else []))
+        seconds = time.perf_counter() - start
+        self.tracer.record(event["type"], "sql", self.sql_seconds)
+        self.tracer.record(event["type"], "payload", seconds - self.sql_seconds, rows)
+        self.notify(window, data)
+
+    def notify(self, window: str,
+               data: Optional[Union[Iterable[Batch], Batch, Dict[str, str]]]) -> None:
+        """Pass data to Controller, with type of processed event if events are timed.
+        So drawing is accounted to the event, which data belongs to.
+
+        :param window: window to draw.
+        :param data: data to draw.
+        """
+        if self.tracer is None:
+            self.callback(window, data)
+        else:
+            self.callback(window, data, self.event_type)
 
     @staticmethod
     def validate_args(window: str, event: Dict[str, Optional[Union[str, int]]]) -> bool:
@@ -49,102 +291,1143 @@ class Model:
     def start_setup(self, event: Dict[str, Optional[Union[str, int]]]
                     ) -> Tuple[str, Dict[str, str]]:
         """Check if database empty. Crete tables if needed.
+        Tables are looked up in schema, so no table pages are read before the first page.
 
         :param event: occurred event data.
         """
         window = "window_main"
-        try:
-            self.cur.execute("SELECT * FROM ACCOUNTING LIMIT 1")
-            self.cur.execute("SELECT * FROM SETTINGS LIMIT 1")
-        except sqlite3.OperationalError:
+        tables = {name for name, in self.cur.execute("SELECT name FROM sqlite_master "
+                                                     "WHERE type='table'")}
+        if {"ACCOUNTING", "SETTINGS"} <= tables:
+            self.migrate_tables()
+        else:
             self.create_tables()
         return window, self.prepare_theme_data()
 
+    def migrate_tables(self) -> None:
+        """Bring tables created by older versions up to date."""
+        schema = self.cur.execute("SELECT sql FROM sqlite_master WHERE name='ACCOUNTING'"
+                                  ).fetchone()[0]
+        if "PRIMARY KEY" not in schema.upper():
+            self.cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS ACCOUNTING_ID ON ACCOUNTING(id)")
+            self.written()
+        columns = {column[1] for column in self.cur.execute("PRAGMA table_info(ACCOUNTING)")}
+        if "day" not in columns:
+            self.cur.execute("ALTER TABLE ACCOUNTING ADD COLUMN day integer")
+            self.con.create_function("parse_date", 1, self.parse_date, deterministic=True)
+            self.cur.execute("UPDATE ACCOUNTING SET day=parse_date(date) WHERE date != ''")
+            self.written()
+        if "currency" not in columns:
+            self.cur.execute("ALTER TABLE ACCOUNTING ADD COLUMN currency text NOT NULL DEFAULT ''")
+            self.cur.execute("DROP TABLE IF EXISTS ROLLUP_DAILY")
+            self.cur.execute("DROP TABLE IF EXISTS ROLLUP_MONTHLY")
+            self.cur.execute("DROP TABLE IF EXISTS BALANCE")
+            self.written()
+        if "category_id" not in columns:
+            self.encode_categories()
+            self.written()
+        if self.cur.execute("PRAGMA user_version").fetchone()[0] < 1:
+            self.cur.execute("DELETE FROM ACCOUNTING WHERE comment = '' AND category_id IS NULL "
+                             "AND value = 0 AND date = ''")
+            self.cur.execute("PRAGMA user_version=1")
+            self.total_rows = None
+            self.analytics = None
+            self.written()
+        if not self.cur.execute("SELECT 1 FROM sqlite_master WHERE name='PARTITIONS'"
+                                ).fetchone():
+            self.create_partitions()
+            self.written()
+        if self.cur.execute("PRAGMA user_version").fetchone()[0] < 2:
+            self.migrate_archives()
+            self.cur.execute("PRAGMA user_version=2")
+        if not self.cur.execute("SELECT 1 FROM sqlite_master WHERE name='RATES'").fetchone():
+            self.create_rates()
+            self.written()
+        if not self.cur.execute("SELECT 1 FROM sqlite_master WHERE name='GOALS'").fetchone():
+            self.create_goals()
+            self.written()
+        if not self.cur.execute("SELECT 1 FROM sqlite_master WHERE name='BALANCE'").fetchone():
+            totals = {}
+            for schemas in self.partition_groups():
+                for schema in schemas:
+                    for value, currency in self.con.execute("SELECT value, currency "
+                                                            f"FROM {schema}.ACCOUNTING"):
+                        totals[currency] = totals.get(currency, 0.0) + self.parse_value(value)
+            self.create_balance()
+            for currency, total in totals.items():
+                self.update_balance(total, currency)
+            self.written()
+        if not self.cur.execute("SELECT 1 FROM sqlite_master WHERE name='ROLLUP_DAILY'"
+                                ).fetchone():
+            self.create_rollups()
+            self.update_rollups(self.con.execute("SELECT category_id, value, day, currency "
+                                                 "FROM ACCOUNTING"))
+            self.written()
+        if self.cur.execute("SELECT 1 FROM sqlite_master WHERE name='ACCOUNTING_FTS'").fetchone():
+            self.search_source = self.fts_source
+        elif self.create_search():
+            self.cur.execute("INSERT INTO ACCOUNTING_FTS(rowid, comment, category) "
+                             "SELECT id, comment, IFNULL(name, '') "
+                             "FROM ACCOUNTING LEFT JOIN CATEGORIES USING (category_id) "
+                             "WHERE comment != '' OR category_id IS NOT NULL")
+            self.written()
+
+    def encode_categories(self) -> None:
+        """Replace category text of Accounting rows with key of Categories table.
+        Rollups and search index are dropped, so they are rebuilt for new keys.
+        Indexes of old table are dropped, renamed table would keep their names.
+        """
+        self.cur.execute("DROP TABLE IF EXISTS ACCOUNTING_FTS")
+        self.cur.execute("DROP TABLE IF EXISTS ROLLUP_DAILY")
+        self.cur.execute("DROP TABLE IF EXISTS ROLLUP_MONTHLY")
+        self.create_categories()
+        self.cur.execute("INSERT OR IGNORE INTO CATEGORIES (name) SELECT TRIM(category) "
+                         "FROM ACCOUNTING WHERE TRIM(category) != '' ORDER BY id")
+        self.cur.execute("DROP INDEX IF EXISTS ACCOUNTING_DAY")
+        self.cur.execute("DROP INDEX IF EXISTS ACCOUNTING_ID")
+        self.cur.execute("ALTER TABLE ACCOUNTING RENAME TO ACCOUNTING_TEXT")
+        self.create_accounting()
+        self.cur.execute("INSERT INTO ACCOUNTING (id, comment, category_id, value, date, day) "
+                         "SELECT id, comment, category_id, value, date, day FROM ACCOUNTING_TEXT "
+                         "LEFT JOIN CATEGORIES ON name = TRIM(category)")
+        self.cur.execute("DROP TABLE ACCOUNTING_TEXT")
+        self.category_ids = None
+        self.analytics = None
+        self.table_versions["CATEGORIES"] += 1
+
     def prepare_theme_data(self) -> Dict[str, str]:
         """Get theme settings from database."""
-        res = self.cur.execute("SELECT * FROM SETTINGS ORDER BY name")
+        res = self.select("SELECT * FROM SETTINGS ORDER BY name", tables=("SETTINGS", ))
         tmpres = {record[0]: record[1] for record in res if record[0] in self.settings_set}
         fullname2tk = {"Background color": "background", "Text color": "fg", "Font": "font"}
         return {fullname2tk[k]: v for k, v in tmpres.items()}
 
     def create_tables(self) -> None:
-        """Create Accounting and Settings tables."""
-        self.cur.execute("CREATE TABLE ACCOUNTING"
-                         "(id integer,"
-                         "comment text,"
-                         "category text,"
-                         "value real,"
-                         "date text)")
-        self.cur.executemany("INSERT INTO ACCOUNTING VALUES (?, ?, ?, ?, ?)",
-                             [(i, "", "", 0.0, "") for i in range(self.num_records_start)])
+        """Create Accounting, Categories, Settings, Goals and Rates tables."""
+        self.create_categories()
+        self.create_accounting()
+        self.cur.execute("PRAGMA user_version=2")
+        self.total_rows = None
         self.cur.execute("CREATE TABLE SETTINGS"
                          "(name text,"
                          "value text)")
         self.cur.executemany("INSERT INTO SETTINGS VALUES (?, ?)",
                              [("Background color", "white"), ("Text color", "black"),
                               ("Font", "Arial")])
+        self.create_goals()
+        self.create_balance()
+        self.create_rates()
+        self.create_rollups()
+        self.create_partitions()
+        self.create_search()
+        self.written(tables=self.table_versions)
+
+    def create_accounting(self, schema: str = "main") -> None:
+        """Create Accounting table, category of row is key of Categories table.
+        Currency of row is empty for base currency.
+
+        :param schema: name of database, in which table is created.
+        """
+        self.cur.execute(f"CREATE TABLE {schema}.ACCOUNTING"
+                         "(id integer PRIMARY KEY,"
+                         "comment text,"
+                         "category_id integer,"
+                         "value real,"
+                         "date text,"
+                         "day integer,"
+                         "currency text NOT NULL DEFAULT '')")
+        self.cur.execute(f"CREATE INDEX {schema}.ACCOUNTING_DAY ON ACCOUNTING(day, category_id)")
+
+    def create_categories(self) -> None:
+        """Create Categories table with unique category names."""
+        self.cur.execute("CREATE TABLE CATEGORIES"
+                         "(category_id integer PRIMARY KEY,"
+                         "name text UNIQUE)")
+
+    def create_goals(self) -> None:
+        """Create Goals table."""
+        self.cur.execute("CREATE TABLE GOALS"
+                         "(goal_id integer PRIMARY KEY,"
+                         "name text,"
+                         "price real)")
+
+    def create_balance(self) -> None:
+        """Create Balance table with sum of values of all Accounting rows of each currency."""
+        self.cur.execute("CREATE TABLE BALANCE"
+                         "(currency text PRIMARY KEY,"
+                         "value real)")
+        self.cur.execute("INSERT INTO BALANCE VALUES ('', 0.0)")
+        self.balances = {"": 0.0}
+
+    def create_rates(self) -> None:
+        """Create Rates table of exchange rates of currencies to base one set on days."""
+        self.cur.execute("CREATE TABLE RATES"
+                         "(currency text,"
+                         "day integer,"
+                         "rate real,"
+                         "PRIMARY KEY (currency, day)) WITHOUT ROWID")
+
+    def balance(self) -> float:
+        """Get sum of values of all Accounting rows converted by the last rates.
+        Sums of currencies are read from database once per session, rates are not read
+        while all values are in base currency.
+        """
+        if self.balances is None:
+            self.balances = dict(self.cur.execute("SELECT currency, value FROM BALANCE"))
+        if not any(self.balances.keys() - {""}):
+            return sum(self.balances.values())
+        rates = self.rates()
+        return sum(value * rates.rate(currency) for currency, value in self.balances.items())
+
+    def update_balance(self, delta: float, currency: str = "") -> None:
+        """Add difference of Accounting values in currency to balance.
+
+        :param delta: sum of new values minus sum of old ones.
+        :param currency: currency of values.
+        """
+        if delta:
+            self.balance()
+            self.cur.execute("INSERT INTO BALANCE VALUES (?, ?) ON CONFLICT(currency) "
+                             "DO UPDATE SET value=value+excluded.value", (currency, delta))
+            self.balances[currency] = self.balances.get(currency, 0.0) + delta
+
+    def rates(self) -> "Rates":
+        """Get exchange rates, read from database once per session.
+        Rates module and numpy are imported on first use, so they do not delay start.
+        """
+        if self.exchange_rates is None:
+            from .Rates import Rates
+            self.exchange_rates = Rates(self.cur.execute("SELECT currency, day, rate FROM RATES "
+                                                         "ORDER BY currency, day"))
+        return self.exchange_rates
+
+    def create_search(self) -> bool:
+        """Create full-text index of comments and categories kept in sync by triggers.
+        Return False if sqlite has no FTS5, then search falls back to LIKE scans.
+        """
+        try:
+            self.cur.execute("CREATE VIRTUAL TABLE ACCOUNTING_FTS USING fts5"
+                             "(comment, category, content='')")
+        except sqlite3.OperationalError:
+            return False
+        delete = ("INSERT INTO ACCOUNTING_FTS(ACCOUNTING_FTS, rowid, comment, category) "
+                  "SELECT 'delete', old.id, old.comment, IFNULL((SELECT name FROM CATEGORIES "
+                  "WHERE category_id = old.category_id), '') "
+                  "WHERE old.comment != '' OR old.category_id IS NOT NULL;")
+        self.create_search_insert()
+        self.cur.execute(f"CREATE TRIGGER ACCOUNTING_FTS_DELETE AFTER DELETE ON ACCOUNTING "
+                         f"BEGIN {delete} END")
+        self.cur.execute("CREATE TRIGGER ACCOUNTING_FTS_UPDATE "
+                         "AFTER UPDATE OF comment, category_id ON ACCOUNTING "
+                         f"BEGIN {delete} {self.fts_insert} END")
+        self.search_source = self.fts_source
+        return True
+
+    def create_search_insert(self) -> None:
+        """Create trigger adding inserted Accounting rows to full-text index."""
+        self.cur.execute("CREATE TRIGGER ACCOUNTING_FTS_INSERT AFTER INSERT ON ACCOUNTING "
+                         f"BEGIN {self.fts_insert} END")
+
+    def create_rollups(self, schema: str = "main") -> None:
+        """Create tables with daily and monthly income and expenses of each category.
+        Sums of each currency are kept separately, not converted.
+
+        :param schema: name of database, in which tables are created.
+        """
+        for table, period in ("ROLLUP_DAILY", "day"), ("ROLLUP_MONTHLY", "month"):
+            self.cur.execute(f"CREATE TABLE {schema}.{table}"
+                             f"({period} integer,"
+                             "category_id integer,"
+                             "currency text,"
+                             "income real,"
+                             "expenses real,"
+                             f"PRIMARY KEY ({period}, category_id, currency))")
+
+    def create_partitions(self) -> None:
+        """Create Partitions table of archived years with paths of their databases.
+        Path is relative to directory of main database, ``last_id`` is maximum id of year rows.
+        """
+        self.cur.execute("CREATE TABLE PARTITIONS"
+                         "(year integer PRIMARY KEY,"
+                         "path text,"
+                         "last_id integer)")
+
+    def partition_paths(self) -> Dict[int, str]:
+        """Get paths of databases of archived years, read from database once per session."""
+        if self.partitions is None:
+            directory = os.path.dirname(os.path.abspath(self.dbpath))
+            self.partitions = {year: os.path.join(directory, path) for year, path
+                               in self.cur.execute("SELECT year, path FROM PARTITIONS")}
+        return self.partitions
+
+    def attach(self, years: List[int], con: Optional[sqlite3.Connection] = None) -> List[str]:
+        """Attach databases of archived years read-only and return their schema names.
+        Least recently used databases are detached to stay within sqlite attach limit.
+
+        :param years: archived years.
+        :param con: connection to attach databases to, writer connection if None.
+        """
+        con = self.con if con is None else con
+        attached = self.attached.setdefault(con, OrderedDict())
+        missing = [year for year in years if year not in attached]
+        if missing and con is self.con:
+            self.flush()
+        for year in missing:
+            while len(attached) >= self.attach_limit:
+                unused = next(old for old in attached if old not in years)
+                con.execute(f"DETACH DATABASE {attached.pop(unused)}")
+            con.execute(f"ATTACH DATABASE ? AS y{year}",
+                        (read_only_uri(self.partition_paths()[year]), ))
+            attached[year] = f"y{year}"
+        for year in years:
+            attached.move_to_end(year)
+        return [attached[year] for year in years]
+
+    def partition_years(self, start: Optional[int] = None, end: Optional[int] = None
+                        ) -> List[int]:
+        """Get sorted archived years overlapping period.
+
+        :param start: first day of period, from the first archived year if None.
+        :param end: last day of period, till the last archived year if None.
+        """
+        first_year = -1 if start is None else self.month_of(start) // 12
+        last_year = datetime.MAXYEAR if end is None else self.month_of(end) // 12
+        return [year for year in sorted(self.partition_paths()) if first_year <= year <= last_year]
+
+    def partition_groups(self, start: Optional[int] = None, end: Optional[int] = None,
+                         con: Optional[sqlite3.Connection] = None) -> Iterator[List[str]]:
+        """Attach databases of archived years overlapping period by groups fitting attach limit.
+        Yield schema names of each group, "main" is in the last one.
+
+        :param start: first day of period, from the first archived year if None.
+        :param end: last day of period, till the last archived year if None.
+        :param con: connection to attach databases to, writer connection if None.
+        """
+        years = self.partition_years(start, end)
+        groups = [years[i:i + self.attach_limit]
+                  for i in range(0, len(years), self.attach_limit)] or [[]]
+        for group in groups[:-1]:
+            yield self.attach(group, con)
+        yield self.attach(groups[-1], con) + ["main"]
+
+    def migrate_archives(self) -> None:
+        """Add currency column to databases of archived years created by older versions.
+        Their rollups are rebuilt with currency key.
+        """
+        self.flush()
+        for schema in self.attached.pop(self.con, {}).values():
+            self.cur.execute(f"DETACH DATABASE {schema}")
+        for path in self.partition_paths().values():
+            self.cur.execute("ATTACH DATABASE ? AS archive", (path, ))
+            try:
+                columns = {column[1] for column
+                           in self.cur.execute("PRAGMA archive.table_info(ACCOUNTING)")}
+                if "currency" not in columns:
+                    self.cur.execute("BEGIN")
+                    self.cur.execute("ALTER TABLE archive.ACCOUNTING "
+                                     "ADD COLUMN currency text NOT NULL DEFAULT ''")
+                    self.cur.execute("DROP TABLE IF EXISTS archive.ROLLUP_DAILY")
+                    self.cur.execute("DROP TABLE IF EXISTS archive.ROLLUP_MONTHLY")
+                    self.create_rollups("archive")
+                    rows = self.con.execute("SELECT category_id, value, day, currency "
+                                            "FROM archive.ACCOUNTING")
+                    self.update_rollups(rows, schema="archive")
+                    self.con.commit()
+            except BaseException:
+                self.con.rollback()
+                raise
+            finally:
+                self.cur.execute("DETACH DATABASE archive")
+
+    def archive_year(self, year: int) -> int:
+        """Move Accounting rows and rollups of closed year into separate database file.
+        Return number of moved rows. Rows of year added later are moved on next call.
+
+        :param year: year before current one.
+        """
+        if year >= datetime.date.today().year:
+            raise ValueError(f"Year {year} is not closed")
+        if self.dbpath == ":memory:":
+            raise ValueError("In-memory database can not be partitioned")
+        root, suffix = os.path.splitext(self.dbpath)
+        path = f"{root}.{year}{suffix or '.db'}"
+        days = self.day_of(year * 12), self.day_of(year * 12 + 12) - 1
+        self.flush()
+        for schema in self.attached.pop(self.con, {}).values():
+            self.cur.execute(f"DETACH DATABASE {schema}")
+        self.cur.execute("ATTACH DATABASE ? AS archive", (path, ))
+        try:
+            if not self.cur.execute("SELECT 1 FROM archive.sqlite_master "
+                                    "WHERE name='ACCOUNTING'").fetchone():
+                self.create_accounting("archive")
+                self.create_rollups("archive")
+            self.cur.execute("INSERT INTO archive.ACCOUNTING "
+                             "SELECT id, comment, category_id, value, date, day, currency "
+                             "FROM main.ACCOUNTING WHERE day BETWEEN ? AND ?", days)
+            moved = self.cur.rowcount
+            months = year * 12, year * 12 + 11
+            for table, period, periods in (("ROLLUP_DAILY", "day", days),
+                                           ("ROLLUP_MONTHLY", "month", months)):
+                self.cur.execute(f"INSERT INTO archive.{table} SELECT * FROM main.{table} "
+                                 f"WHERE {period} BETWEEN ? AND ? "
+                                 f"ON CONFLICT({period}, category_id, currency) DO UPDATE SET "
+                                 "income=income+excluded.income, "
+                                 "expenses=expenses+excluded.expenses", periods)
+                self.cur.execute(f"DELETE FROM main.{table} WHERE {period} BETWEEN ? AND ?",
+                                 periods)
+            self.cur.execute("DELETE FROM main.ACCOUNTING WHERE day BETWEEN ? AND ?", days)
+            self.cur.execute("INSERT INTO PARTITIONS SELECT ?, ?, MAX(id) FROM archive.ACCOUNTING "
+                             "WHERE true ON CONFLICT(year) DO UPDATE SET last_id=excluded.last_id",
+                             (year, os.path.basename(path)))
+            self.con.commit()
+        except BaseException:
+            self.con.rollback()
+            raise
+        finally:
+            self.cur.execute("DETACH DATABASE archive")
+        self.partitions = None
+        self.total_rows = None
+        self.analytics = None
+        self.written(0)
+        return moved
+
+    def parse_date(self, date: Optional[str]) -> Optional[int]:
+        """Convert date text to number of days since epoch.
+
+        :param date: date in one of supported formats.
+        """
+        date = str(date).strip()
+        try:
+            parsed = datetime.date.fromisoformat(date)
+        except ValueError:
+            parsed = None
+        for date_format in self.date_formats:
+            if parsed is not None:
+                break
+            try:
+                parsed = datetime.datetime.strptime(date, date_format).date()
+            except ValueError:
+                continue
+        if parsed is None:
+            return None
+        return parsed.toordinal() - datetime.date(1970, 1, 1).toordinal()
+
+    @staticmethod
+    def parse_value(value: Optional[Union[str, float]]) -> float:
+        """Convert value to number, not numbers are zero.
+
+        :param value: entered value.
+        """
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
+
+    @staticmethod
+    def month_of(day: int) -> int:
+        """Get month number since year 0 for day since epoch.
+
+        :param day: days since epoch.
+        """
+        date = datetime.date.fromordinal(day + datetime.date(1970, 1, 1).toordinal())
+        return date.year * 12 + date.month - 1
+
+    def update_rollups(self, rows: Iterable[Tuple[Optional[int], Union[str, float],
+                                                  Optional[int], str]], sign: int = 1,
+                       schema: str = "main") -> None:
+        """Add rows to daily and monthly rollups or subtract them.
+        Rows without valid date are not included into rollups, rows without category
+        are included with category key 0.
+
+        :param rows: rows of category key, value, days since epoch and currency.
+        :param sign: 1 to add rows, -1 to subtract.
+        :param schema: name of database, in which rollups are kept.
+        """
+        daily = {}
+        for category, value, day, currency in rows:
+            value = self.parse_value(value)
+            if day is None or not value:
+                continue
+            totals = daily.setdefault((day, category or 0, currency), [0.0, 0.0])
+            totals[value < 0] += abs(value)
+        monthly = {}
+        for (day, category, currency), (income, expenses) in daily.items():
+            totals = monthly.setdefault((self.month_of(day), category, currency), [0.0, 0.0])
+            totals[0] += income
+            totals[1] += expenses
+        if sign < 0:
+            daily = {k: (-income, -expenses) for k, (income, expenses) in daily.items()}
+            monthly = {k: (-income, -expenses) for k, (income, expenses) in monthly.items()}
+        for table, period, totals in (("ROLLUP_DAILY", "day", daily),
+                                      ("ROLLUP_MONTHLY", "month", monthly)):
+            self.cur.executemany(f"INSERT INTO {schema}.{table} VALUES (?, ?, ?, ?, ?) "
+                                 f"ON CONFLICT({period}, category_id, currency) DO UPDATE SET "
+                                 "income=income+excluded.income, "
+                                 "expenses=expenses+excluded.expenses",
+                                 [(*key, income, expenses)
+                                  for key, (income, expenses) in totals.items()])
+
+    def analytics_cache(self) -> Optional["Analytics"]:
+        """Get columnar copy of ledger, loaded on first use, None if it is disabled."""
+        if self.analytics_enabled and self.analytics is None:
+            from .Analytics import Analytics
+            rows = []
+            with self.reader() as con:
+                for schemas in self.partition_groups(con=con):
+                    rows.extend(self.cursor(con).execute(" UNION ALL ".join(
+                        f"SELECT id, category_id, value, day, currency FROM {schema}.ACCOUNTING"
+                        for schema in schemas)))
+            rows.sort()
+            self.analytics = Analytics(((row_id, category, value if value.__class__ is float
+                                         else self.parse_value(value), day, currency)
+                                        for row_id, category, value, day, currency in rows),
+                                       self.month_of, self.rates())
+        return self.analytics
 
     def accounting_navigation(self, event: Dict[str, Optional[Union[str, int]]]
-                              ) -> Tuple[str, Iterable[Dict[str, Union[int, float, str]]]]:
+                              ) -> Tuple[str, Iterable[Batch]]:
         """Prepare data to draw Accounting window.
-        Return data only on first call, because View store them too.
+        View passes its page as for ``accounting_page``, unchanged page is read from cache.
 
         :param event: occurred event data.
         """
+        self.flush()
+        self.shown_window = "window_accounting"
+        return self.accounting_page(event)
+
+    def accounting_total(self) -> int:
+        """Get number of rows in Accounting table, counted once per session."""
+        if self.total_rows is None:
+            self.total_rows = self.cur.execute("SELECT COUNT(*) FROM ACCOUNTING").fetchone()[0]
+        return self.total_rows
+
+    def accounting_message(self, op: str, rows: Iterable[Tuple], offset: int = 0) -> Batch:
+        """Pack Accounting rows into message for View.
+        Message "op" is one of "page", "changed", "appended" or "deleted".
+
+        :param op: message operation.
+        :param rows: affected database rows.
+        :param offset: position of first row in table.
+        """
+        return Batch(op, self.accounting_columns, rows, self.accounting_total(), offset)
+
+    def accounting_page(self, event: Dict[str, Optional[Union[str, int, float]]]
+                        ) -> Tuple[str, Iterable[Batch]]:
+        """Prepare page of Accounting rows using keyset pagination on id.
+        Page starts with ``start`` id going "forward" or ends with it going "backward".
+        Instead of ``start`` the ``fraction`` of ledger may be passed to jump by scrollbar.
+        Page near the end is shifted back, so it has ``count`` rows without ``reserve`` ones,
+        which are left for blank rows of View.
+        If ``query`` is passed, only rows with comment or category words starting with
+        query words are paged on read-only connection. Search is interrupted
+        if ``superseded`` returns True.
+
+        :param event: occurred event data with start, count, reserve, direction, offset, query.
+        """
         window = "window_accounting"
-        if self.initial_call[window]:
-            self.initial_call[window] = False
-            res = self.cur.execute("SELECT * FROM ACCOUNTING ORDER BY id")
-            result = []
-            for row, record in enumerate(res):
-                for col, val in enumerate(record):
-                    if col != 0:
-                        result.append({"row": row, "col": col - 1, "data": val if val else ""})
-            return window, result
+        match = self.search_match(event.get("query"))
+        with contextlib.nullcontext(self.con) if match is None else self.reader() as con:
+            if match is not None and self.superseded is not None:
+                con.set_progress_handler(self.superseded, 1000)
+            try:
+                rows, offset, total = self.page_rows(event, match, con)
+            except sqlite3.OperationalError as error:
+                if "interrupt" not in str(error):
+                    raise
+                return window, []
+            finally:
+                con.set_progress_handler(None, 0)
+        return window, [Batch("page", self.accounting_columns, rows, total, offset)]
+
+    def page_rows(self, event: Dict[str, Optional[Union[str, int, float]]], match: Optional[str],
+                  con: Optional[sqlite3.Connection] = None) -> Tuple[List[Tuple], int, int]:
+        """Get page rows, position of the first of them and number of rows matching search.
+
+        :param event: occurred event data with start, count, direction and offset of page.
+        :param match: search expression, all rows are paged if None.
+        :param con: connection running queries, shared cursor of writer if None.
+        """
+        params = {"count": event.get("count") or self.page_size, "match": match}
+        total = self.accounting_total() if match is None else self.search_count(match, con)
+        start, offset = event.get("start"), event.get("offset") or 0
+        backward = event.get("direction") == "backward"
+        if event.get("fraction") is not None:
+            first, last = (self.select(self.page_ids("", descending, match),
+                                       dict(params, count=1), con=con)
+                           for descending in (False, True))
+            if first:
+                start = int(first[0][0] + event["fraction"] * (last[0][0] - first[0][0]))
+            offset = int(event["fraction"] * total)
+        if start is None:
+            start, offset, backward = -1, 0, False
+        if backward:
+            rows = self.select(self.page_select(" <= :start", True, match),
+                               dict(params, start=start), con=con)[::-1]
+            if len(rows) < params["count"]:
+                start, offset, backward = -1, 0, False
+            offset = max(offset, 0)
+        if not backward:
+            rows = self.select(self.page_select(" >= :start", False, match),
+                               dict(params, start=start), con=con)
+            filled = params["count"] - (event.get("reserve") or 0)
+            if len(rows) < filled and offset:
+                rows = self.select(self.page_select("", True, match),
+                                   dict(params, count=filled), con=con)[::-1]
+                offset = total - len(rows)
+        return rows, offset, total
+
+    def page_ids(self, condition: str, descending: bool, match: Optional[str]) -> str:
+        """Build query of ids of page rows, limited by ``:count`` parameter.
+
+        :param condition: condition on id, e.g. " >= :start", no condition if empty.
+        :param descending: take rows from the end.
+        :param match: search expression, all rows are paged if None.
+        """
+        order = " DESC" if descending else ""
+        if match is None:
+            source, key = "SELECT id FROM ACCOUNTING", "id"
+            condition = condition and f" WHERE id{condition}"
         else:
-            return window, []
+            source, key = self.search_source
+            condition = condition and f" AND {key}{condition}"
+        return f"{source}{condition} ORDER BY {key}{order} LIMIT :count"
+
+    def page_select(self, condition: str, descending: bool, match: Optional[str]) -> str:
+        """Build query of page rows ordered by id.
+
+        :param condition: condition on id, e.g. " >= :start", no condition if empty.
+        :param descending: take rows from the end.
+        :param match: search expression, all rows are paged if None.
+        """
+        ids = self.page_ids(condition, descending, match)
+        order = " DESC" if descending else ""
+        return f"{self.accounting_select} WHERE id IN ({ids}) ORDER BY id{order}"
+
+    def search_match(self, query: Optional[str]) -> Optional[str]:
+        """Convert search text to expression of search source, None if text is empty.
+
+        :param query: search text.
+        """
+        words = (query or "").split()
+        if not words:
+            return None
+        if self.search_source is self.like_source:
+            escaped = re.sub(r"([\\%_])", r"\\\1", " ".join(words))
+            return f"%{escaped}%"
+        return " ".join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+    def search_count(self, match: str, con: Optional[sqlite3.Connection] = None) -> int:
+        """Get number of rows matching search expression, counted once until next write.
+
+        :param match: search expression.
+        :param con: connection running query, shared cursor of writer if None.
+        """
+        return self.select(f"SELECT COUNT(*) FROM ({self.search_source[0]})",
+                           {"match": match}, con=con)[0][0]
 
     def accounting_update_row(self, event: Dict[str, Optional[Union[str, int]]]
-                              ) -> Tuple[str, Iterable[Dict[str, Union[int, float, str]]]]:
-        """Update changed entry in database.
-        If last row was modified, add new entries.
+                              ) -> Tuple[str, Iterable[Batch]]:
+        """Update changed entry in database, add it to the end if it has no id.
+        Only affected row is passed to View, as "changed" or "appended" one.
+        Currency of row is kept if event has no ``currency``.
+
+        :param event: occurred event data.
+        """
+        window = "window_accounting"
+        event = dict(event, id=event.get("id"), day=self.parse_date(event["date"]),
+                     category_id=self.category_id(event["category"]))
+        old = self.cur.execute("SELECT category_id, value, day, currency FROM ACCOUNTING "
+                               "WHERE id=?", (event["id"], )).fetchall()
+        if event.get("currency") is not None:
+            event["currency"] = event["currency"].strip().upper()
+        else:
+            event["currency"] = old[0][3] if old else ""
+        total = self.accounting_total()
+        self.update_rollups(old, -1)
+        self.cur.execute("INSERT INTO ACCOUNTING "
+                         "(id, comment, category_id, value, date, day, currency) "
+                         f"VALUES (COALESCE(:id, ({self.next_id_select}), 0), "
+                         ":comment, :category_id, :value, :date, :day, :currency) "
+                         "ON CONFLICT(id) DO UPDATE SET comment=excluded.comment, "
+                         "category_id=excluded.category_id, value=excluded.value, "
+                         "date=excluded.date, day=excluded.day, currency=excluded.currency",
+                         event)
+        row_id = self.cur.lastrowid if event["id"] is None else event["id"]
+        self.update_rollups([(event["category_id"], event["value"], event["day"],
+                              event["currency"])])
+        for _, value, _, currency in old:
+            self.update_balance(-self.parse_value(value), currency)
+        self.update_balance(self.parse_value(event["value"]), event["currency"])
+        if self.analytics is not None:
+            self.analytics.update(row_id, event["category_id"], self.parse_value(event["value"]),
+                                  event["day"], event["currency"])
+        if not old:
+            self.total_rows = total + 1
+        rows = self.cur.execute(self.accounting_select + " WHERE id=?", (row_id, )).fetchall()
+        self.written()
+        return window, [self.accounting_message("changed" if old else "appended", rows)]
+
+    def accounting_delete_row(self, event: Dict[str, Optional[Union[str, int]]]
+                              ) -> Tuple[str, Iterable[Batch]]:
+        """Delete entry from database.
+
+        :param event: occurred event data.
+        """
+        window = "window_accounting"
+        total = self.accounting_total()
+        old = self.cur.execute("SELECT category_id, value, day, currency FROM ACCOUNTING "
+                               "WHERE id=:id", event).fetchall()
+        self.update_rollups(old, -1)
+        for _, value, _, currency in old:
+            self.update_balance(-self.parse_value(value), currency)
+        self.cur.execute("DELETE FROM ACCOUNTING WHERE id=:id", event)
+        if self.analytics is not None:
+            self.analytics.delete(event["id"])
+        self.total_rows = total - self.cur.rowcount
+        self.written()
+        return window, [Batch("deleted", ("id", ), [(event["id"], )], self.total_rows)]
+
+    def accounting_import(self, event: Dict[str, Optional[Union[str, int]]]
+                          ) -> Tuple[str, Iterable[Batch]]:
+        """Import bank statement and redraw visible rows.
+
+        :param event: occurred event data with statement path, its currency and visible page.
+        """
+        window = "window_accounting"
+        try:
+            self.import_file(event["path"], lambda imported: self.notify(window, [Batch(
+                "progress", ("imported", ), [(imported, )], self.accounting_total())]),
+                currency=event.get("currency") or "")
+        except (OSError, ValueError, csv.Error) as error:
+            return window, [Batch("error", ("message", ), [(str(error), )],
+                                  self.accounting_total())]
+        return self.accounting_page(event)
+
+    def accounting_archive(self, event: Dict[str, Optional[Union[str, int]]]
+                           ) -> Tuple[str, Iterable[Batch]]:
+        """Move rows of closed year into separate database and redraw visible rows.
+
+        :param event: occurred event data with year and visible page.
+        """
+        window = "window_accounting"
+        try:
+            self.archive_year(int(event["year"]))
+        except (ValueError, sqlite3.Error) as error:
+            return window, [Batch("error", ("message", ), [(str(error), )],
+                                  self.accounting_total())]
+        return self.accounting_page(event)
+
+    def accounting_add_row(self, event: Dict[str, Optional[Union[str, int]]]
+                           ) -> Tuple[str, Iterable[Batch]]:
+        """Add row to the end of table.
 
         :param event: occurred event data.
         """
+        return self.accounting_update_row(dict(event, id=None))
+
+    def categories(self) -> Dict[str, int]:
+        """Get keys of category names, read from database once per session.
+        Names are also kept sorted case insensitive for completion.
+        """
+        if self.category_ids is None:
+            self.category_ids = dict(self.cur.execute("SELECT name, category_id FROM CATEGORIES"))
+            self.category_keys = sorted((name.casefold(), name) for name in self.category_ids)
+        return self.category_ids
+
+    def category_id(self, name: Optional[str]) -> Optional[int]:
+        """Get key of category, adding it to Categories table if it is new.
+
+        :param name: category name, None is returned for empty name.
+        """
+        name = (name or "").strip()
+        if not name:
+            return None
+        if name not in self.categories():
+            self.cur.execute("INSERT INTO CATEGORIES (name) VALUES (?)", (name, ))
+            self.table_versions["CATEGORIES"] += 1
+            self.category_ids[name] = self.cur.lastrowid
+            bisect.insort(self.category_keys, (name.casefold(), name))
+        return self.category_ids[name]
+
+    def accounting_complete(self, event: Dict[str, Optional[Union[str, int]]]
+                            ) -> Tuple[str, Iterable[Batch]]:
+        """Find categories starting with typed text, case insensitive.
+        Batch offset is pool row, in which text is typed.
+
+        :param event: occurred event data with typed ``prefix``, pool ``row`` and ``count``.
+        """
+        self.categories()
+        prefix = (event.get("prefix") or "").casefold()
+        start = bisect.bisect_left(self.category_keys, (prefix, ))
+        end = start + (event.get("count") or 10)
+        names = [(name, ) for key, name in self.category_keys[start:end] if key.startswith(prefix)]
+        return "window_accounting", [Batch("completion", ("category", ), names,
+                                           self.accounting_total(), event.get("row") or 0)]
+
+    def accounting_export(self, event: Dict[str, Optional[Union[str, int]]]
+                          ) -> Tuple[str, Iterable[Batch]]:
+        """Stream Accounting rows of main and archived databases to CSV or JSON Lines file.
+        Rows may be filtered by first and last ``start`` and ``end`` dates, ``category`` name
+        and text contained in ``comment``.
+
+        :param event: occurred event data with path and format of file and filters.
+        """
         window = "window_accounting"
-        self.cur.execute("UPDATE ACCOUNTING SET comment=:comment, category=:category, "
-                         "value=:value, date=:date WHERE id=:id", event)
-        if event["id"] % 20 == 19:
-            self.cur.executemany("INSERT INTO ACCOUNTING VALUES (?, ?, ?, ?, ?)",
-                                 [(event["id"] + 1 + i, "", "", 0.0, "")
-                                  for i in range(self.num_records_start)])
-            res = self.cur.execute("SELECT * FROM ACCOUNTING ORDER BY id")
-            result = [{"row": row, "col": col - 1, "data": val if val else ""}
-                      for row, record in enumerate(res)
-                      for col, val in enumerate(record) if col != 0]
-            return window, result
-        return window, []
+        conditions, params = [], {}
+        for name in "start", "end":
+            if event.get(name):
+                params[name] = self.parse_date(event[name])
+                if params[name] is None:
+                    return window, [Batch("invalid", ("rows", ), [])]
+                conditions.append(f"day {'>=' if name == 'start' else '<='} :{name}")
+        if event.get("category") is not None:
+            category = event["category"].strip()
+            params["category"] = self.categories().get(category, -1) if category else None
+            conditions.append("IFNULL(category_id, 0) = IFNULL(:category, 0)")
+        if event.get("comment"):
+            params["comment"] = "%{}%".format(re.sub(r"([\\%_])", r"\\\1", event["comment"]))
+            conditions.append("comment LIKE :comment ESCAPE '\\'")
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        def batches():
+            with self.reader() as con:
+                for schemas in self.partition_groups(params.get("start"), params.get("end"),
+                                                     con):
+                    rows = self.cursor(con).execute(
+                        f"{self.ledger_select(schemas)}{where} ORDER BY id", params)
+                    yield from iter(lambda: rows.fetchmany(self.export_batch), [])
+
+        exported = self.write_rows(event["path"], event.get("format"), self.accounting_columns,
+                                   batches())
+        return window, [Batch("exported", ("rows", ), [(exported, )])]
+
+    @staticmethod
+    def ledger_select(schemas: List[str]) -> str:
+        """Build query of Accounting rows of several databases with category names.
+
+        :param schemas: names of databases.
+        """
+        rows = " UNION ALL ".join(f"SELECT id, comment, category_id, value, date, day, currency "
+                                  f"FROM {schema}.ACCOUNTING" for schema in schemas)
+        return (f"SELECT id, comment, IFNULL(name, ''), value, date, currency FROM ({rows}) "
+                "LEFT JOIN main.CATEGORIES USING (category_id)")
+
+    def report_export(self, event: Dict[str, Optional[Union[str, int]]]) -> Tuple[str, Batch]:
+        """Write income and expenses of each category over period to CSV or JSON Lines file.
+
+        :param event: occurred event data with path and format of file, first and last date.
+        """
+        window, report = self.report_query(event)
+        if report.op == "invalid":
+            return window, Batch("invalid", ("rows", ), [])
+        exported = self.write_rows(event["path"], event.get("format"), self.report_columns,
+                                   [report.materialize().rows])
+        return window, Batch("exported", ("rows", ), [(exported, )])
+
+    @staticmethod
+    def write_rows(path: str, file_format: Optional[str], columns: Tuple[str, ...],
+                   batches: Iterable[List[Tuple]]) -> int:
+        """Write batches of rows to file through buffered writer and return number of rows.
+
+        :param path: path to file.
+        :param file_format: "csv" or "jsonl", guessed by file suffix if None.
+        :param columns: names of row columns.
+        :param batches: lists of rows.
+        """
+        path = os.path.expanduser(path)
+        if file_format is None:
+            file_format = "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+        written = 0
+        with open(path, "w", newline="", encoding="utf-8", buffering=2 ** 16) as output:
+            if file_format == "csv":
+                writer = csv.writer(output)
+                writer.writerow(columns)
+            for batch in batches:
+                if file_format == "csv":
+                    writer.writerows(batch)
+                else:
+                    for row in batch:
+                        output.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                        output.write("\n")
+                written += len(batch)
+        return written
+
+    def import_file(self, path: str, progress: Optional[Callable[[int], None]] = None,
+                    batch_size: int = 10000, currency: str = "") -> int:
+        """Import CSV, OFX or QIF statement into Accounting table in one transaction.
+        Rows are added to the end of table. Instead of indexing each row by trigger,
+        search index gets all imported rows by one statement. If statement can not be read,
+        the whole import is rolled back.
+
+        :param path: path to statement.
+        :param progress: callback called with number of imported rows after each batch.
+        :param batch_size: number of rows inserted at once.
+        :param currency: currency of statement, empty for base currency.
+        """
+        currency = currency.strip().upper()
+        rows = Import.normalize(Import.read_statement(path), self.parse_date)
+        total = self.accounting_total()
+        first_id = self.cur.execute(self.next_id_select).fetchone()[0] or 0
+        ids = itertools.count(first_id)
+        imported = 0
+        indexed = self.search_source is self.fts_source
+        self.flush()
+        self.cur.execute("BEGIN")
+        try:
+            if indexed:
+                self.cur.execute("DROP TRIGGER ACCOUNTING_FTS_INSERT")
+            while True:
+                batch = [(next(ids), comment, self.category_id(category), value, date, day,
+                          currency) for comment, category, value, date, day
+                         in itertools.islice(rows, batch_size)]
+                if not batch:
+                    break
+                self.cur.executemany(self.accounting_insert, batch)
+                self.update_rollups((category, value, day, currency)
+                                    for _, _, category, value, _, day, _ in batch)
+                self.update_balance(sum(self.parse_value(row[3]) for row in batch), currency)
+                if self.analytics is not None:
+                    for row_id, _, category, value, _, day, _ in batch:
+                        self.analytics.append(row_id, category, self.parse_value(value), day,
+                                              currency)
+                imported += len(batch)
+                if progress:
+                    progress(imported)
+            if indexed:
+                self.cur.execute("INSERT INTO ACCOUNTING_FTS(rowid, comment, category) "
+                                 "SELECT id, comment, IFNULL(name, '') "
+                                 "FROM ACCOUNTING LEFT JOIN CATEGORIES USING (category_id) "
+                                 "WHERE id >= ? AND (comment != '' OR category_id IS NOT NULL)",
+                                 (first_id, ))
+                self.create_search_insert()
+        except BaseException:
+            self.con.rollback()
+            if indexed and not self.cur.execute("SELECT 1 FROM sqlite_master "
+                                                "WHERE name='ACCOUNTING_FTS_INSERT'").fetchone():
+                self.create_search_insert()
+            self.total_rows = None
+            self.balances = None
+            self.analytics = None
+            self.category_ids = None
+            raise
+        self.total_rows = total + imported
+        self.written(imported)
+        self.flush()
+        return imported
 
     def settings_navigation(self, event: Dict[str, Optional[Union[str, int]]]
-                            ) -> Tuple[str, Iterable[Dict[str, Union[int, float, str]]]]:
-        """Prepare data to draw Settings window.
-        Return data only on first call, because View store them too.
+                            ) -> Tuple[str, Batch]:
+        """Prepare data to draw Settings window, unchanged settings are read from cache.
 
         :param event: occurred event data.
         """
         window = "window_settings"
-        if self.initial_call[window]:
-            self.initial_call[window] = False
-            res = self.cur.execute("SELECT * FROM SETTINGS ORDER BY name ")
-            result = [{"row": row, "col": col, "data": val}
-                      for row, record in enumerate(res)
-                      for col, val in enumerate(record)]
-            return window, result
-        return window, []
+        self.flush()
+        self.shown_window = window
+        rows = self.select("SELECT name, value FROM SETTINGS ORDER BY name", tables=("SETTINGS", ))
+        return window, Batch("page", ("name", "value"), rows)
+
+    def goals_navigation(self, event: Dict[str, Optional[Union[str, int]]]
+                         ) -> Tuple[str, Batch]:
+        """Prepare goals with savings allocated to them in order of adding.
+        Savings are the balance of all Accounting rows, so goals are not re-summed from ledger.
+
+        :param event: occurred event data.
+        """
+        self.flush()
+        self.shown_window = "window_goals"
+        left = max(self.balance(), 0.0)
+        rows = []
+        for goal_id, name, price in self.select("SELECT goal_id, name, price FROM GOALS "
+                                                "ORDER BY goal_id", tables=("GOALS", )):
+            saved = min(left, max(self.parse_value(price), 0.0))
+            left -= saved
+            rows.append((goal_id, name, price, saved))
+        return "window_goals", Batch("goals", self.goal_columns, rows, self.balance())
+
+    def goals_update_row(self, event: Dict[str, Optional[Union[str, int]]]
+                         ) -> Tuple[str, Batch]:
+        """Update goal name and price, add goal if it has no id.
+
+        :param event: occurred event data.
+        """
+        event = dict(event, id=event.get("id"), price=self.parse_value(event["price"]))
+        self.cur.execute("INSERT INTO GOALS (goal_id, name, price) VALUES (:id, :name, :price) "
+                         "ON CONFLICT(goal_id) DO UPDATE SET name=excluded.name, "
+                         "price=excluded.price", event)
+        self.written(tables=("GOALS", ))
+        return self.goals_navigation(event)
+
+    def goals_delete_row(self, event: Dict[str, Optional[Union[str, int]]]
+                         ) -> Tuple[str, Batch]:
+        """Delete goal.
+
+        :param event: occurred event data.
+        """
+        self.cur.execute("DELETE FROM GOALS WHERE goal_id=:id", event)
+        self.written(tables=("GOALS", ))
+        return self.goals_navigation(event)
+
+    def rates_update_row(self, event: Dict[str, Optional[Union[str, int]]]
+                         ) -> Tuple[str, Optional[Batch]]:
+        """Set exchange rate of currency to base one from date, View keeps shown report.
+        Rate is not set if currency, date or rate is invalid.
+
+        :param event: occurred event data with currency, date and rate.
+        """
+        window = "window_report"
+        currency = (event.get("currency") or "").strip().upper()
+        day = self.parse_date(event.get("date"))
+        rate = self.parse_value(event.get("rate"))
+        if not currency or day is None or rate <= 0:
+            return window, Batch("invalid", ("currency", "date", "rate"), [])
+        self.cur.execute("INSERT INTO RATES VALUES (?, ?, ?) ON CONFLICT(currency, day) "
+                         "DO UPDATE SET rate=excluded.rate", (currency, day, rate))
+        self.exchange_rates = None
+        if self.analytics is not None:
+            self.analytics.set_rates(self.rates())
+        self.written(tables=("RATES", ))
+        return window, None
+
+    def report_navigation(self, event: Dict[str, Optional[Union[str, int]]]
+                          ) -> Tuple[str, Optional[Batch]]:
+        """Show Report window, View keeps last report.
+
+        :param event: occurred event data.
+        """
+        self.flush()
+        self.shown_window = "window_report"
+        return "window_report", None
+
+    def report_query(self, event: Dict[str, Optional[Union[str, int]]]) -> Tuple[str, Batch]:
+        """Prepare income and expenses of each category over period.
+        If analytics cache is enabled, it is aggregated from cache. Otherwise whole months
+        of period are read from monthly rollup, the rest days from daily one. Rollups of
+        each database, main one and archived years overlapping period, are aggregated
+        separately and summed in the same order, serially on read-only connection or
+        in worker processes for long periods, so both ways give the same report.
+        Daily sums in other currencies are converted by rates as of their days.
+
+        :param event: occurred event data with first and last date of period.
+        """
+        window = "window_report"
+        start, end = self.parse_date(event["start"]), self.parse_date(event["end"])
+        if start is None or end is None or start > end:
+            return window, Batch("invalid", self.report_columns, [])
+        if self.analytics_cache() is not None:
+            return window, self.report_message(self.analytics.by_category(start, end))
+        epoch = datetime.date(1970, 1, 1).toordinal()
+        min_day, max_day = 1 - epoch, datetime.date.max.toordinal() - epoch
+        first_month, last_month = self.month_of(start), self.month_of(end)
+        first_month += start > min_day and self.month_of(start - 1) == first_month
+        last_month -= end < max_day and self.month_of(end + 1) == last_month
+        if first_month <= last_month:
+            first_day = self.day_of(first_month)
+            last_day = end if last_month == self.month_of(end) else self.day_of(last_month + 1) - 1
+            days = (start, first_day - 1, last_day + 1, end)
+        else:
+            days = (start, end, 1, 0)
+        params = dict(zip(("first_month", "last_month", "start", "before", "after", "end"),
+                          (first_month, last_month, *days)))
+        totals, converted = {}, []
+        for rows in self.report_shards(start, end, params):
+            for row in rows:
+                if row[1]:
+                    converted.append(row)
+                    continue
+                category_totals = totals.setdefault(row[0], [0.0, 0.0])
+                category_totals[0] += row[3]
+                category_totals[1] += row[4]
+        if not converted:
+            return window, self.report_message(totals)
+        for category, (income, expenses) in self.rates().by_category(converted).items():
+            category_totals = totals.setdefault(category, [0.0, 0.0])
+            category_totals[0] += income
+            category_totals[1] += expenses
+        return window, self.report_message(totals)
+
+    def report_shards(self, start: int, end: int, params: Dict[str, int]
+                      ) -> Iterator[List[Tuple]]:
+        """Yield rows of ``rollup_select`` of each database, archived years first.
+        Each database holds disjoint days, so it is a shard aggregated by worker process
+        if workers are enabled and period is long and spans archived years. Otherwise
+        databases are aggregated serially through result cache. Rollups make each shard
+        a few small queries, so workers pay off only for many large archives.
+
+        :param start: first day of period.
+        :param end: last day of period.
+        :param params: parameters of ``rollup_select``.
+        """
+        years = self.partition_years(start, end)
+        if self.workers < 2 or not years or end - start < self.parallel_days:
+            with self.reader() as con:
+                for schemas in self.partition_groups(start, end, con):
+                    for schema in schemas:
+                        yield self.select(self.rollup_select(schema), params, con=con)
+            return
+        self.flush()
+        if self.executor is None:
+            import concurrent.futures
+            self.executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+        paths = [self.partition_paths()[year] for year in years] + [self.dbpath]
+        yield from self.executor.map(self.shard_totals, paths, itertools.repeat(params))
+
+    @staticmethod
+    def rollup_select(schema: str) -> str:
+        """Build query of income and expenses by category from rollups of one database.
+        Rows have category, currency, day, income and expenses. Rows in base currency
+        are summed by category: whole months are taken from monthly rollup, days from
+        ``start`` to ``before`` and from ``after`` to ``end`` from daily one.
+        Rows in other currencies are daily ones.
+
+        :param schema: name of database.
+        """
+        return ("SELECT category_id, '', NULL, SUM(income), SUM(expenses) FROM ("
+                f"SELECT category_id, income, expenses FROM {schema}.ROLLUP_MONTHLY "
+                "WHERE currency = '' AND month BETWEEN :first_month AND :last_month UNION ALL "
+                f"SELECT category_id, income, expenses FROM {schema}.ROLLUP_DAILY "
+                "WHERE currency = '' "
+                "AND (day BETWEEN :start AND :before OR day BETWEEN :after AND :end)) "
+                "GROUP BY category_id UNION ALL "
+                f"SELECT category_id, currency, day, income, expenses FROM {schema}.ROLLUP_DAILY "
+                "WHERE day BETWEEN :start AND :end AND currency != ''")
+
+    @staticmethod
+    def shard_totals(path: str, params: Dict[str, int]) -> List[Tuple]:
+        """Aggregate rollups of one database on own read-only connection of worker process.
+
+        :param path: path to database.
+        :param params: parameters of ``rollup_select``.
+        """
+        con = sqlite3.connect(read_only_uri(path), uri=True)
+        try:
+            return con.execute(Model.rollup_select("main"), params).fetchall()
+        finally:
+            con.close()
+
+    def report_message(self, totals: Dict[Optional[int], Iterable[float]]) -> Batch:
+        """Pack income and expenses of categories into report sorted by category name.
+        Categories with zero income and expenses are skipped.
+
+        :param totals: income and expenses of category keys.
+        """
+        names = {category_id: name for name, category_id in self.categories().items()}
+        rows = sorted((names.get(category, ""), income, expenses)
+                      for category, (income, expenses) in totals.items()
+                      if round(income, 6) or round(expenses, 6))
+        return Batch("report", self.report_columns, rows)
+
+    @staticmethod
+    def day_of(month: int) -> int:
+        """Get days since epoch for first day of month.
+
+        :param month: month number since year 0.
+        """
+        epoch = datetime.date(1970, 1, 1).toordinal()
+        return datetime.date(month // 12, month % 12 + 1, 1).toordinal() - epoch
 
     def process_event(self, event: Dict[str, Optional[Union[str, int]]]
-                      ) -> Tuple[str, Union[Iterable[Dict[str, Union[int, float, str]]],
-                                            Dict[str, str]]]:
+                      ) -> Tuple[str, Union[Iterable[Batch], Batch, Dict[str, str]]]:
         """Call event corresponding handler function.
 
         :param event: occurred event data.
@@ -153,14 +1436,13 @@ class Model:
 
     def theme_setup(self, event: Dict[str, Optional[Union[str, int]]]) -> Tuple[str, Iterable]:
         """Navigate after theme was applied.
+        Settings window is shown again after settings were changed, Accounting one on start.
 
         :param event: occurred event data.
         """
-        window = "window_settings"
-        if self.initial_call[window]:
-            return self.accounting_navigation(event)
-        else:
+        if self.shown_window == "window_settings":
             return self.settings_navigation(event)
+        return self.accounting_navigation(event)
 
     def settings_update_row(self, event: Dict[str, Optional[Union[str, int]]]
                             ) -> Tuple[str, Iterable]:
@@ -170,4 +1452,5 @@ class Model:
         """
         window = "window_main"
         self.cur.execute("UPDATE SETTINGS SET value=:value WHERE name=:name", event)
+        self.written(tables=("SETTINGS", ))
         return window, self.prepare_theme_data()
@@ -0,0 +1,70 @@
+"""Pool of read-only database connections for heavy reads."""
+import queue
+import sqlite3
+import threading
+import contextlib
+from typing import Iterator, List
+
+
+def read_only_uri(path: str) -> str:
+    """Get URI, by which database file is opened read-only.
+
+    :param path: path to database.
+    """
+    import pathlib
+    return f"{pathlib.Path(path).resolve().as_uri()}?mode=ro"
+
+
+class ReaderPool:
+    """Read-only connections to database, opened on demand up to pool size.
+
+    Connections are opened by ``mode=ro`` URI with memory-mapped I/O. Database is in WAL
+    mode, so they read the last committed snapshot while writer goes on. Connections may
+    be taken from any thread, each one is used by one thread at a time.
+    """
+
+    def __init__(self, dbpath: str, size: int = 2, mmap_size: int = 2 ** 28) -> None:
+        """Store options, connections are opened later.
+
+        :param dbpath: path to database.
+        :param size: maximum number of connections.
+        :param mmap_size: maximum number of bytes of database mapped into memory.
+        """
+        self.dbpath = dbpath
+        self.size = size
+        self.mmap_size = mmap_size
+        self.connections: List[sqlite3.Connection] = []
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Take idle connection, open new one or wait until another user returns one."""
+        try:
+            con = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                con = self.open() if len(self.connections) < self.size else None
+            if con is None:
+                con = self.idle.get()
+        try:
+            yield con
+        finally:
+            self.idle.put(con)
+
+    def open(self) -> sqlite3.Connection:
+        """Open read-only connection in autocommit mode and add it to pool.
+        Each query reads its own snapshot, no snapshot is kept between queries.
+        """
+        con = sqlite3.connect(read_only_uri(self.dbpath), uri=True, check_same_thread=False,
+                              isolation_level=None)
+        con.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        self.connections.append(con)
+        return con
+
+    def close(self) -> None:
+        """Close all connections, they must be returned to pool."""
+        for con in self.connections:
+            con.close()
+        self.connections.clear()
+        self.idle = queue.LifoQueue()
@@ -0,0 +1,101 @@
+"""Exchange rates of currencies to base currency, looked up as of day.
+
+Rates of each currency are kept as columns sorted by day and found by binary search,
+vectorized with numpy if it is installed. numpy is imported on first conversion,
+so loading rates does not slow down start.
+"""
+import array
+import bisect
+from typing import Optional, Dict, Iterable, List, Tuple
+
+
+class Rates:
+    """Day and rate columns of each currency.
+
+    Rate as of day is the last rate set on or before it, the first one for earlier days.
+    Base currency has empty name, values in it and in currencies without rates
+    are taken as is.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, int, float]]) -> None:
+        """Load columns.
+
+        :param rows: rows of currency, days since epoch and rate ordered by currency and day.
+        """
+        self.days: Dict[str, array.array] = {}
+        self.rates: Dict[str, array.array] = {}
+        for currency, day, rate in rows:
+            if currency not in self.days:
+                self.days[currency] = array.array("q")
+                self.rates[currency] = array.array("d")
+            self.days[currency].append(day)
+            self.rates[currency].append(rate)
+        self.cache: Dict[Tuple[str, Optional[int]], float] = {}
+
+    def rate(self, currency: str, day: Optional[int] = None) -> float:
+        """Get rate of currency as of day, the last rate if day is None.
+        Found rates are remembered for each currency and day.
+
+        :param currency: currency name.
+        :param day: days since epoch.
+        """
+        rate = self.cache.get((currency, day))
+        if rate is None:
+            days = self.days.get(currency)
+            if not days:
+                rate = 1.0
+            else:
+                position = len(days) if day is None else bisect.bisect_right(days, day)
+                rate = self.rates[currency][max(position - 1, 0)]
+            self.cache[currency, day] = rate
+        return rate
+
+    def by_category(self, rows: List[Tuple[int, str, int, float, float]]
+                    ) -> Dict[int, Tuple[float, float]]:
+        """Sum income and expenses of daily rows by category, converted as of their days.
+
+        :param rows: rows of category key, currency, day, income and expenses.
+        """
+        result = {}
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        if numpy is None:
+            for category, currency, day, income, expenses in rows:
+                rate = self.rate(currency, day)
+                totals = result.setdefault(category, [0.0, 0.0])
+                totals[0] += income * rate
+                totals[1] += expenses * rate
+            return {key: (income, expenses) for key, (income, expenses) in result.items()}
+        by_currency = {}
+        for row in rows:
+            by_currency.setdefault(row[1], []).append(row)
+        for currency, currency_rows in sorted(by_currency.items()):
+            categories, _, days, income, expenses = zip(*currency_rows)
+            categories, days = numpy.array(categories), numpy.array(days)
+            income = self.convert(currency, days, numpy.array(income))
+            expenses = self.convert(currency, days, numpy.array(expenses))
+            keys, positions = numpy.unique(categories, return_inverse=True)
+            income = numpy.bincount(positions, income, len(keys))
+            expenses = numpy.bincount(positions, expenses, len(keys))
+            for key, key_income, key_expenses in zip(keys.tolist(), income.tolist(),
+                                                     expenses.tolist()):
+                totals = result.get(key, (0.0, 0.0))
+                result[key] = totals[0] + key_income, totals[1] + key_expenses
+        return result
+
+    def convert(self, currency: str, days, values):
+        """Convert numpy array of values in currency as of numpy array of their days.
+
+        :param currency: currency name.
+        :param days: days since epoch of values.
+        :param values: values in currency.
+        """
+        if not self.days.get(currency):
+            return values
+        import numpy
+        positions = numpy.searchsorted(numpy.frombuffer(self.days[currency], dtype="q"), days,
+                                       side="right")
+        rates = numpy.frombuffer(self.rates[currency], dtype="d")
+        return values * rates[numpy.maximum(positions - 1, 0)]
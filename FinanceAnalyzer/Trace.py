@@ -0,0 +1,151 @@
+"""Opt-in timing of events on their way from Controller through Model to View."""
+import json
+import time
+import sqlite3
+import threading
+from typing import Optional, Dict, Tuple
+
+
+class Histogram:
+    """Distribution of durations with power of two buckets in microseconds.
+
+    Memory does not depend on number of recorded durations.
+    """
+
+    __slots__ = ("count", "total", "max", "rows", "widgets", "buckets")
+
+    def __init__(self) -> None:
+        """Create empty histogram."""
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.widgets = 0
+        self.buckets = [0] * 40
+
+    def add(self, seconds: float, rows: int = 0, widgets: int = 0) -> None:
+        """Account one duration.
+
+        :param seconds: duration in seconds.
+        :param rows: number of rows touched.
+        :param widgets: number of widgets touched.
+        """
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+        self.widgets += widgets
+        self.buckets[min(int(seconds * 1e6).bit_length(), len(self.buckets) - 1)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Get upper bound of duration not exceeded by fraction of recorded durations.
+
+        :param fraction: fraction of durations, e.g. 0.95.
+        """
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= fraction * self.count:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Get histogram statistics as dictionary."""
+        return {"count": self.count, "total": self.total,
+                "mean": self.total / self.count if self.count else 0.0, "max": self.max,
+                "p50": self.percentile(0.5), "p95": self.percentile(0.95),
+                "p99": self.percentile(0.99), "rows": self.rows, "widgets": self.widgets,
+                "buckets_us": {1 << bucket >> 1: count
+                               for bucket, count in enumerate(self.buckets) if count}}
+
+
+class Tracer:
+    """Histograms of event phase durations: "sql", "payload" and "draw".
+
+    "sql" is time of running statements and fetching their rows, "payload" is the rest
+    of Model event handler and "draw" is time of View drawing. Phases may be recorded
+    from different threads.
+    """
+
+    def __init__(self) -> None:
+        """Create empty tracer."""
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.lock = threading.Lock()
+
+    def record(self, event_type: Optional[str], phase: str, seconds: float, rows: int = 0,
+               widgets: int = 0) -> None:
+        """Account duration of event phase.
+
+        :param event_type: Model event type, recorded as "unknown" if None.
+        :param phase: event phase.
+        :param seconds: duration in seconds.
+        :param rows: number of rows touched.
+        :param widgets: number of widgets touched.
+        """
+        key = event_type or "unknown", phase
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].add(seconds, rows, widgets)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Get statistics of each event type and phase."""
+        result = {}
+        with self.lock:
+            for (event_type, phase), histogram in sorted(self.histograms.items()):
+                result.setdefault(event_type, {})[phase] = histogram.summary()
+        return result
+
+    def export(self, path: str) -> None:
+        """Write statistics to JSON file.
+
+        :param path: path to output file.
+        """
+        with open(path, "w") as output:
+            json.dump(self.summary(), output, indent=2)
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor accounting time of running statements and fetching their rows.
+
+    Time is added to ``sql_seconds`` of its ``timer``. Cursor is used only for timed events,
+    so untimed ones run on plain cursors.
+    """
+
+    timer = None
+
+    def timed(self, method, *args):
+        """Call cursor method and account its duration.
+
+        :param method: method of base cursor class.
+        :param args: method arguments.
+        """
+        start = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            self.timer.sql_seconds += time.perf_counter() - start
+
+    def execute(self, *args):
+        """Run statement."""
+        return self.timed(sqlite3.Cursor.execute, *args)
+
+    def executemany(self, *args):
+        """Run statement for each parameters."""
+        return self.timed(sqlite3.Cursor.executemany, *args)
+
+    def fetchone(self):
+        """Fetch next row."""
+        return self.timed(sqlite3.Cursor.fetchone)
+
+    def fetchmany(self, *args):
+        """Fetch next rows."""
+        return self.timed(sqlite3.Cursor.fetchmany, *args)
+
+    def fetchall(self):
+        """Fetch remaining rows."""
+        return self.timed(sqlite3.Cursor.fetchall)
+
+    def __next__(self):
+        """Fetch next row while iterating."""
+        return self.timed(sqlite3.Cursor.__next__)
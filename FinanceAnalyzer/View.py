@@ -3,92 +3,459 @@ import os
 import re
 import gettext
 import tkinter as tk
-from typing import Optional, Dict, Union, Callable, Iterable, Tuple
-
-
-gettext.install("FinanceAnalyzer", os.path.dirname(__file__), names=("ngettext", ))
+from tkinter import ttk, font
+from typing import Optional, Dict, Union, Callable, Iterable, List, Tuple
+from .Batch import Batch
 
 
 class WindowAccounting(tk.Frame):
-    """WindowAccounting frame."""
+    """WindowAccounting frame.
+
+    Only a fixed pool of rows is created. Pool rows are rebound to ledger rows while scrolling,
+    so the number of widgets does not depend on ledger length. The first pool row after
+    the ledger end is a blank row, in which new ledger row is typed.
+    """
 
     def __init__(self, master: Optional[tk.Frame],
                  callback: Callable[[Dict[str, Optional[Union[str, int]]]], None]
                  ) -> None:
-        """Create nested frames.
+        """Create nested frames and pool of entries.
 
         :param master: master frame.
         :param callback: callback passed by Controller.
         """
         super().__init__(master)
-        self.num_columns = 4
+        self.num_columns = 5
+        self.num_rows = 30
+        self.first_row = 0
+        self.total_rows = 0
+        self.row_ids = []
+        self.touched = 0
+        self.query = ""
+        self.completing = None
+        self.search_delay = 200
+        self.search_job = None
         self.callback = callback
         self.canvas = View.fc(tk.Canvas, self, "0:0", True)
         self.scrollbar = View.fc(tk.Scrollbar, self, "0:1.0", True, orient="vertical",
-                                 command=self.canvas.yview)
-        self.main_scrollable_frame, unused = View.fc(tk.Frame, self.canvas, "0:0")
-        self.main_scrollable_frame.bind("<Configure>", lambda e: self.canvas.configure(
-            scrollregion=self.canvas.bbox("all")))
+                                 command=self.yview)
+        self.main_scrollable_frame, unused = View.fc(ttk.Frame, self.canvas, "0:0")
         self.canvas.create_window((0, 0), window=self.main_scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-        self.comment = View.fc(tk.Label, self.main_scrollable_frame, "0:0", True,
+        self.comment = View.fc(ttk.Label, self.main_scrollable_frame, "0:0", True,
                                text=_("Comment"))
-        self.category = View.fc(tk.Label, self.main_scrollable_frame, "0:1", True,
+        self.category = View.fc(ttk.Label, self.main_scrollable_frame, "0:1", True,
                                 text=_("Category"))
-        self.value = View.fc(tk.Label, self.main_scrollable_frame, "0:2", True,
+        self.value = View.fc(ttk.Label, self.main_scrollable_frame, "0:2", True,
                              text=_("Income/Expenses"))
-        self.data = View.fc(tk.Label, self.main_scrollable_frame, "0:3", True, text=_("Date"))
+        self.data = View.fc(ttk.Label, self.main_scrollable_frame, "0:3", True, text=_("Date"))
+        self.currency = View.fc(ttk.Label, self.main_scrollable_frame, "0:4", True,
+                                text=_("Currency"))
+        self.tools_frame = View.fc(ttk.Frame, self, "1.0:0+1", True)
+        self.import_button = View.fc(ttk.Button, self.tools_frame, "0:0.0", True,
+                                     text=_("Import..."), command=self.import_statement)
+        self.status = View.fc(ttk.Label, self.tools_frame, "0:1", True, anchor="w")
+        self.search_label = View.fc(ttk.Label, self.tools_frame, "0:2.0", True, text=_("Search"))
+        self.search_entry = View.fc(ttk.Entry, self.tools_frame, "0:3.0", True,
+                                    font=View.font_name)
+        self.search_entry.bind("<KeyRelease>", lambda _: self.schedule_search())
+        self.search_entry.bind("<Escape>", lambda _: self.clear_search())
         self.entries = {}
+        for row in range(self.num_rows):
+            for col in range(self.num_columns):
+                self.entries[row, col] = View.fc(ttk.Entry, self.main_scrollable_frame,
+                                                 f"{row + 1}:{col}", True, state="disabled",
+                                                 font=View.font_name)
+                self.entries[row, col].bind('<Return>', lambda _, row=row: self.update_row(row))
+                self.entries[row, col].bind('<Control-Delete>',
+                                            lambda _, row=row: self.delete_row(row))
+                self.bind_wheel(self.entries[row, col])
+            self.entries[row, 1].bind("<KeyRelease>",
+                                      lambda e, row=row: self.complete_category(row, e.char))
+            self.entries[row, 4].configure(width=5)
+        self.bind_wheel(self.canvas)
+
+    def bind_wheel(self, widget: tk.Widget) -> None:
+        """Scroll rows with mouse wheel over widget.
+
+        :param widget: widget to bind.
+        """
+        widget.bind("<MouseWheel>",
+                    lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        widget.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        widget.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
 
-    def __call__(self, data: Iterable[Dict[str, Union[int, str, float]]],
-                 theme_info: Dict[str, str]) -> None:
-        """Draw passed entries.
+    def yview(self, *args) -> None:
+        """Request page of rows for new scroll position.
+        Relative scrolling uses ids of bound rows as keys, so Model does not skip rows.
 
-        :param data: entries data.
-        :param theme_info: theme settings.
+        :param args: scrollbar command arguments.
+        """
+        if args[0] == "moveto":
+            self.callback({"type": "accounting_page", "fraction": min(max(float(args[1]), 0), 1),
+                           "count": self.num_rows, "reserve": 1, "query": self.query})
+            return
+        step = int(args[1]) * (self.num_rows - 1 if args[2] == "pages" else 1)
+        if not self.row_ids or not step:
+            return
+        if step > 0:
+            if self.tail_visible() and len(self.row_ids) < self.num_rows:
+                return
+            idx = min(step, len(self.row_ids) - 1)
+            self.request_page(self.row_ids[idx], "forward", self.first_row + idx)
+        elif self.first_row > 0:
+            idx = max(len(self.row_ids) - 1 + step, 0)
+            self.request_page(self.row_ids[idx], "backward",
+                              self.first_row + idx - self.num_rows + 1)
+
+    def request_page(self, start: Optional[int], direction: str = "forward", offset: int = 0,
+                     event_type: str = "accounting_page") -> None:
+        """Request page of rows from Controller.
+
+        :param start: id of first row for "forward" or last row for "backward" direction.
+        :param direction: page direction.
+        :param offset: expected position of first page row in ledger.
+        :param event_type: Model event type.
+        """
+        self.callback({"type": event_type, "start": start, "direction": direction,
+                       "offset": offset, "count": self.num_rows, "reserve": 1,
+                       "query": self.query})
+
+    def navigate(self) -> None:
+        """Request to show window with the same page as before."""
+        self.request_page(self.row_ids[0] if self.row_ids else None, offset=self.first_row,
+                          event_type="accounting_navigation")
+
+    def tail_visible(self) -> bool:
+        """Check if the last ledger row is bound to pool row or ledger is empty."""
+        return self.first_row + len(self.row_ids) >= self.total_rows
+
+    def schedule_search(self) -> None:
+        """Search typed text when typing pauses, so only the last keystroke is searched."""
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(self.search_delay, self.search)
+
+    def search(self) -> None:
+        """Request first page of rows matching search text if it has changed."""
+        self.search_job = None
+        query = self.search_entry.get().strip()
+        if query != self.query:
+            self.query = query
+            self.request_page(None)
+
+    def clear_search(self) -> None:
+        """Clear search text and show all rows."""
+        self.search_entry.delete(0, "end")
+        self.search()
+
+    def __call__(self, data: Iterable[Batch]) -> int:
+        """Apply passed messages to pool rows in place and return number of touched widgets.
+
+        :param data: "page", "changed", "appended" or "deleted" batches.
+        """
+        self.touched = 0
+        for message in data:
+            getattr(self, "apply_" + message.op)(message)
+        total = self.total_rows + 1
+        self.scrollbar.set(self.first_row / total,
+                           min(1.0, (self.first_row + self.num_rows) / total))
+        return self.touched
+
+    def fill_row(self, row: int, record: Optional[Tuple[Union[int, float, str], ...]]) -> None:
+        """Bind pool row to ledger row or clear it.
+
+        :param row: row number in pool.
+        :param record: ledger row starting with id, clear pool row if None.
+        """
+        self.touched += self.num_columns
+        for col in range(self.num_columns):
+            entry = self.entries[row, col]
+            entry.configure(state="normal")
+            entry.delete(0, "end")
+            if record is None:
+                entry.configure(state="disabled")
+            elif record[col + 1]:
+                entry.insert(0, record[col + 1])
+
+    def apply_page(self, message: Batch) -> None:
+        """Bind pool rows to page of ledger rows.
+
+        :param message: page batch.
+        """
+        self.first_row, self.total_rows = message.offset, message.total
+        self.row_ids = []
+        for record in message:
+            if len(self.row_ids) >= self.num_rows:
+                break
+            self.fill_row(len(self.row_ids), record)
+            self.row_ids.append(record[0])
+        self.fill_blank()
+
+    def fill_blank(self) -> None:
+        """Clear pool rows after bound ones, the first of them is blank row if tail is visible."""
+        for row in range(len(self.row_ids), self.num_rows):
+            self.fill_row(row, None)
+        if len(self.row_ids) < self.num_rows and self.tail_visible():
+            for col in range(self.num_columns):
+                self.entries[len(self.row_ids), col].configure(state="normal")
+
+    def apply_changed(self, message: Batch) -> None:
+        """Redraw changed rows if they are visible.
+
+        :param message: changed batch.
+        """
+        if self.query:
+            self.request_search_page(self.row_ids)
+            return
+        self.total_rows = message.total
+        visible = {row_id: row for row, row_id in enumerate(self.row_ids)}
+        for record in message:
+            if record[0] in visible:
+                self.fill_row(visible[record[0]], record)
+
+    def apply_appended(self, message: Batch) -> None:
+        """Bind appended rows to blank and free pool rows if ledger tail is visible.
+        If pool gets full, scroll to show new blank row.
+
+        :param message: appended batch.
+        """
+        if self.query:
+            self.request_search_page(self.row_ids)
+            return
+        tail_visible = self.tail_visible()
+        self.total_rows = message.total
+        if not tail_visible:
+            return
+        for record in message:
+            if len(self.row_ids) >= self.num_rows:
+                break
+            self.fill_row(len(self.row_ids), record)
+            self.row_ids.append(record[0])
+        if len(self.row_ids) < self.num_rows:
+            self.fill_blank()
+        elif self.tail_visible():
+            self.request_page(self.row_ids[1], "forward", self.first_row + 1)
+
+    def apply_deleted(self, message: Batch) -> None:
+        """Forget deleted rows and request visible page again if it has changed.
+
+        :param message: deleted batch.
+        """
+        deleted = {record[0] for record in message}
+        if self.query:
+            self.request_search_page([row_id for row_id in self.row_ids if row_id not in deleted])
+            return
+        self.total_rows = message.total
+        if self.row_ids and deleted and min(deleted) < self.row_ids[0]:
+            self.first_row = max(self.first_row - len(deleted), 0)
+        row_ids = [row_id for row_id in self.row_ids if row_id not in deleted]
+        if len(row_ids) != len(self.row_ids):
+            self.request_page(row_ids[0] if row_ids else None, "forward", self.first_row)
+
+    def request_search_page(self, row_ids: List[int]) -> None:
+        """Request visible page of search results again after edit.
+        Edited rows may stop or start matching and totals of edit messages count
+        the whole ledger, so they are not applied while searching.
+
+        :param row_ids: ids of visible rows, which were not deleted.
+        """
+        self.request_page(row_ids[0] if row_ids else None, "forward", self.first_row)
+
+    def apply_progress(self, message: Batch) -> None:
+        """Show number of imported rows.
+
+        :param message: progress batch.
         """
-        for entry in data:
-            row, col = entry["row"], entry["col"]
-            self.entries[row, col] = View.fc(tk.Entry, self.main_scrollable_frame,
-                                             f"{row + 1}:{col}", True, **theme_info)
-            self.entries[row, col].insert(0, entry["data"])
-            self.entries[row, col].bind('<Return>', lambda _, row=row: self.update_row(row))
+        self.touched += 1
+        for imported, in message:
+            self.status.configure(text=_("Imported: {}").format(imported))
+
+    def apply_exported(self, message: Batch) -> None:
+        """Show number of exported rows.
+
+        :param message: exported batch.
+        """
+        self.touched += 1
+        for exported, in message:
+            self.status.configure(text=_("Exported: {}").format(exported))
+
+    def apply_invalid(self, message: Batch) -> None:
+        """Show that export filter is invalid.
+
+        :param message: invalid batch.
+        """
+        self.touched += 1
+        self.status.configure(text=_("Invalid period"))
+
+    def apply_error(self, message: Batch) -> None:
+        """Show error message.
+
+        :param message: error batch.
+        """
+        self.touched += 1
+        for text, in message:
+            self.status.configure(text=text)
+
+    def apply_completion(self, message: Batch) -> None:
+        """Replace typed category with the first found one and select completed part.
+        Found name is matched case insensitive, so stored name replaces typed text
+        to keep its case. Completion is dropped if text was changed since it was requested.
+
+        :param message: completion batch with pool row as offset.
+        """
+        entry = self.entries[message.offset, 1]
+        if self.completing != (message.offset, entry.get()):
+            return
+        prefix = self.completing[1]
+        for name, in message:
+            entry.delete(0, "end")
+            entry.insert(0, name)
+            entry.selection_range(len(prefix), "end")
+            entry.icursor(len(prefix))
+            self.touched += 1
+            break
+
+    def complete_category(self, row: int, char: str) -> None:
+        """Request categories starting with text typed in category entry.
+
+        :param row: row number in pool.
+        :param char: typed character, completion is requested only for printable ones.
+        """
+        entry = self.entries[row, 1]
+        prefix = entry.get()
+        if len(char) != 1 or not char.isprintable() or entry.index("insert") != len(prefix):
+            return
+        self.completing = row, prefix
+        self.callback({"type": "accounting_complete", "prefix": prefix, "row": row, "count": 1})
+
+    def import_statement(self) -> None:
+        """Ask statement file and pass it to Controller with visible page."""
+        from tkinter import filedialog
+        path = filedialog.askopenfilename(filetypes=[(_("Bank statements"),
+                                                      "*.csv *.ofx *.qfx *.qif")])
+        if path:
+            self.callback({"type": "accounting_import", "path": path,
+                           "start": self.row_ids[0] if self.row_ids else None,
+                           "offset": self.first_row, "count": self.num_rows, "reserve": 1,
+                           "query": self.query})
 
     def update_row(self, row: int) -> None:
         """Pass edited data to Controller.
 
-        :param row: row number.
+        :param row: row number in pool, new ledger row is added from blank row.
         """
+        values = [self.entries[row, col].get() for col in range(self.num_columns)]
+        if row < len(self.row_ids):
+            row_id = self.row_ids[row]
+        elif row == len(self.row_ids) and self.tail_visible() and any(values):
+            row_id = None
+        else:
+            return
         self.callback({"type": "accounting_update_row",
-                       "id": row,
+                       "id": row_id,
                        "comment": self.entries[row, 0].get(),
                        "category": self.entries[row, 1].get(),
                        "value": self.entries[row, 2].get(),
-                       "date": self.entries[row, 3].get()
+                       "date": self.entries[row, 3].get(),
+                       "currency": self.entries[row, 4].get(),
                        })
 
+    def delete_row(self, row: int) -> None:
+        """Pass deleted row id to Controller.
+
+        :param row: row number in pool.
+        """
+        if row < len(self.row_ids):
+            self.callback({"type": "accounting_delete_row", "id": self.row_ids[row]})
+
 
 class WindowGoals(tk.Frame):
-    """WindowGoals frame."""
+    """WindowGoals frame.
+
+    Each goal row has name and price entries and progress bar of savings allocated to goal.
+    Rows are reused on redraw. The last row is blank, in which new goal is typed.
+    """
 
     def __init__(self, master: Optional[tk.Frame],
                  callback: Callable[[Dict[str, Optional[Union[str, int]]]], None]
                  ) -> None:
-        """Create nested frames.
+        """Create balance label and headers.
 
         :param master: master frame.
         :param callback: callback passed by Controller.
         """
         super().__init__(master)
+        self.callback = callback
+        self.goal_ids = []
+        self.rows = []
+        self.balance = View.fc(ttk.Label, self, "0.0:0+3", True, anchor="w")
+        self.headers = [View.fc(ttk.Label, self, "1.0:0", True, text=_("Goal")),
+                        View.fc(ttk.Label, self, "1.0:1", True, text=_("Price")),
+                        View.fc(ttk.Label, self, "1.0:2+1", True, text=_("Saved"))]
 
-    def __call__(self, data: Iterable[Dict[str, Union[int, str, float]]],
-                 theme_info: Dict[str, str]) -> None:
-        """Draw passed data.
+    def __call__(self, data: Batch) -> int:
+        """Draw goals and savings and return number of touched widgets.
 
-        :param data: entries data.
-        :param theme_info: theme settings.
+        :param data: batch of goals with saved sums, total is balance of ledger.
+        """
+        self.balance.configure(text=_("Savings: {:.2f}").format(data.total))
+        self.goal_ids = []
+        for goal_id, name, price, saved in data:
+            self.fill_row(len(self.goal_ids), name, f"{price:.2f}", price, saved)
+            self.goal_ids.append(goal_id)
+        self.fill_row(len(self.goal_ids), "", "", 0.0, 0.0)
+        for widgets in self.rows[len(self.goal_ids) + 1:]:
+            for widget in widgets:
+                widget.destroy()
+        del self.rows[len(self.goal_ids) + 1:]
+        return 1 + 4 * len(self.rows)
+
+    def fill_row(self, row: int, name: str, text: str, price: float, saved: float) -> None:
+        """Show goal in row, creating row widgets if needed.
+
+        :param row: row number.
+        :param name: goal name.
+        :param text: price text.
+        :param price: goal price.
+        :param saved: savings allocated to goal.
+        """
+        if row == len(self.rows):
+            widgets = (View.fc(ttk.Entry, self, f"{row + 2}.0:0", True, font=View.font_name),
+                       View.fc(ttk.Entry, self, f"{row + 2}.0:1", True, font=View.font_name),
+                       View.fc(ttk.Progressbar, self, f"{row + 2}.0:2", True),
+                       View.fc(ttk.Label, self, f"{row + 2}.0:3", True))
+            for entry in widgets[:2]:
+                entry.bind('<Return>', lambda _, row=row: self.update_row(row))
+                entry.bind('<Control-Delete>', lambda _, row=row: self.delete_row(row))
+            self.rows.append(widgets)
+        name_entry, price_entry, progress, label = self.rows[row]
+        for entry, value in (name_entry, name), (price_entry, text):
+            entry.delete(0, "end")
+            entry.insert(0, value)
+        progress.configure(maximum=price if price > 0 else 1.0, value=saved)
+        label.configure(text=f"{saved:.2f}" if text else "")
+
+    def update_row(self, row: int) -> None:
+        """Pass edited goal to Controller, new goal is added from blank row.
+
+        :param row: row number.
+        """
+        name, price = self.rows[row][0].get(), self.rows[row][1].get()
+        if row < len(self.goal_ids):
+            goal_id = self.goal_ids[row]
+        elif name or price:
+            goal_id = None
+        else:
+            return
+        self.callback({"type": "goals_update_row", "id": goal_id, "name": name, "price": price})
+
+    def delete_row(self, row: int) -> None:
+        """Pass id of goal to delete to Controller.
+
+        :param row: row number.
         """
-        pass
+        if row < len(self.goal_ids):
+            self.callback({"type": "goals_delete_row", "id": self.goal_ids[row]})
 
 
 class WindowReport(tk.Frame):
@@ -97,21 +464,90 @@ class WindowReport(tk.Frame):
     def __init__(self, master: Optional[tk.Frame],
                  callback: Callable[[Dict[str, Optional[Union[str, int]]]], None]
                  ) -> None:
-        """Create nested frames.
+        """Create period and exchange rate entries and report frame.
 
         :param master: master frame.
         :param callback: callback passed by Controller.
         """
         super().__init__(master)
+        self.callback = callback
+        self.period_frame = View.fc(ttk.Frame, self, "0.0:0", True)
+        self.widgets = [View.fc(ttk.Label, self.period_frame, "0:0", True, text=_("From")),
+                        View.fc(ttk.Entry, self.period_frame, "0:1", True, font=View.font_name),
+                        View.fc(ttk.Label, self.period_frame, "0:2", True, text=_("To")),
+                        View.fc(ttk.Entry, self.period_frame, "0:3", True, font=View.font_name),
+                        View.fc(ttk.Button, self.period_frame, "0:4", True, text=_("Show"),
+                                command=self.query)]
+        self.start, self.end = self.widgets[1], self.widgets[3]
+        self.start.bind('<Return>', lambda _: self.query())
+        self.end.bind('<Return>', lambda _: self.query())
+        self.rate_frame = View.fc(ttk.Frame, self, "1.0:0", True)
+        self.rate_widgets = [View.fc(ttk.Label, self.rate_frame, "0:0", True,
+                                     text=_("Currency")),
+                             View.fc(ttk.Entry, self.rate_frame, "0:1", True, width=5,
+                                     font=View.font_name),
+                             View.fc(ttk.Label, self.rate_frame, "0:2", True, text=_("From")),
+                             View.fc(ttk.Entry, self.rate_frame, "0:3", True,
+                                     font=View.font_name),
+                             View.fc(ttk.Label, self.rate_frame, "0:4", True, text=_("Rate")),
+                             View.fc(ttk.Entry, self.rate_frame, "0:5", True,
+                                     font=View.font_name),
+                             View.fc(ttk.Button, self.rate_frame, "0:6", True,
+                                     text=_("Set rate"), command=self.set_rate),
+                             View.fc(ttk.Label, self.rate_frame, "0:7", True)]
+        self.currency, self.rate_date, self.rate = self.rate_widgets[1:6:2]
+        self.rate_status = self.rate_widgets[-1]
+        for entry in self.currency, self.rate_date, self.rate:
+            entry.bind('<Return>', lambda _: self.set_rate())
+        self.report_frame = View.fc(ttk.Frame, self, "2:0", True)
+        self.entries = {}
 
-    def __call__(self, data: Iterable[Dict[str, Union[int, str, float]]],
-                 theme_info: Dict[str, str]) -> None:
-        """Draw passed data.
+    def query(self) -> None:
+        """Pass report period to Controller."""
+        self.callback({"type": "report_query", "start": self.start.get(), "end": self.end.get()})
 
-        :param data: entries data.
-        :param theme_info: theme settings.
+    def set_rate(self) -> None:
+        """Pass exchange rate of currency from date to Controller.
+        Shown report is requested again, so its sums are converted by new rate.
+        """
+        self.rate_status.configure(text="")
+        self.callback({"type": "rates_update_row", "currency": self.currency.get(),
+                       "date": self.rate_date.get(), "rate": self.rate.get()})
+        if self.entries:
+            self.query()
+
+    def __call__(self, data: Optional[Batch]) -> int:
+        """Draw report with income and expenses of each category and totals.
+        Return number of touched widgets.
+
+        :param data: batch of categories incomes and expenses, keep shown report if None
+            or if it is invalid rate batch.
         """
-        pass
+        if data is None:
+            return 0
+        if data.op == "invalid" and "rate" in data.columns:
+            self.rate_status.configure(text=_("Invalid rate"))
+            return 1
+        for label in self.entries.values():
+            label.destroy()
+        self.entries = {}
+        if data.op == "invalid":
+            self.entries[0, 0] = View.fc(ttk.Label, self.report_frame, "0:0", True,
+                                         text=_("Invalid period"))
+            return 1
+        headers = _("Category"), _("Income"), _("Expenses")
+        totals = [0.0, 0.0]
+        rows = [headers]
+        for category, income, expenses in data:
+            rows.append((category or "-", f"{income:.2f}", f"{expenses:.2f}"))
+            totals[0] += income
+            totals[1] += expenses
+        rows.append((_("Total"), f"{totals[0]:.2f}", f"{totals[1]:.2f}"))
+        for row, record in enumerate(rows):
+            for col, text in enumerate(record):
+                self.entries[row, col] = View.fc(ttk.Label, self.report_frame,
+                                                 f"{row}.0:{col}", True, text=text)
+        return len(self.entries)
 
 
 class WindowSettings(tk.Frame):
@@ -129,23 +565,22 @@ class WindowSettings(tk.Frame):
         self.callback = callback
         self.entries = {}
 
-    def __call__(self, data: Iterable[Dict[str, Union[int, str, float]]],
-                 theme_info: Dict[str, str]) -> None:
-        """Draw passed entries.
+    def __call__(self, data: Batch) -> int:
+        """Draw passed entries and return number of touched widgets.
+        Widgets are created on first call, later their texts are updated.
 
-        :param data: entries data.
-        :param theme_info: theme settings.
+        :param data: batch of settings names and values.
         """
-        for entry in data:
-            row, col, entry_data = entry["row"], entry["col"], entry["data"]
-            if col == 0:
-                self.entries[row, col] = View.fc(tk.Label, self, f"{row + 1}.0:{col}", True,
-                                                 text=entry_data, **theme_info)
-            else:
-                self.entries[row, col] = View.fc(tk.Entry, self, f"{row + 1}.0:{col}", True,
-                                                 **theme_info)
-                self.entries[row, col].insert(0, entry_data)
-                self.entries[row, col].bind('<Return>', lambda _, row=row: self.update_row(row))
+        for row, (name, value) in enumerate(data):
+            if (row, 0) not in self.entries:
+                self.entries[row, 0] = View.fc(ttk.Label, self, f"{row + 1}.0:0", True)
+                self.entries[row, 1] = View.fc(ttk.Entry, self, f"{row + 1}.0:1", True,
+                                               font=View.font_name)
+                self.entries[row, 1].bind('<Return>', lambda _, row=row: self.update_row(row))
+            self.entries[row, 0].configure(text=name)
+            self.entries[row, 1].delete(0, "end")
+            self.entries[row, 1].insert(0, value)
+        return len(self.entries)
 
     def update_row(self, row: int) -> None:
         """Pass edited data to Controller.
@@ -159,82 +594,111 @@ class WindowSettings(tk.Frame):
 
 
 class View:
-    """MVC View class."""
+    """MVC View class.
+
+    Widgets take colors from shared ttk styles and font from one named font,
+    so changing theme reconfigures a constant number of objects. Windows are built
+    on first navigation, so start draws only buttons and the first shown window.
+    """
 
+    font_name = "FinanceAnalyzerFont"
+    window_classes = {"window_accounting": WindowAccounting, "window_goals": WindowGoals,
+                      "window_report": WindowReport, "window_settings": WindowSettings}
     sep_geom = "", r"\.", r"\+", ":", r"\.", r"\+"
     re_geom = re.compile("".join((f"(?:{f}([0-9]*))?" for f in sep_geom)) + "(?:/([NEWSnews]+))?")
 
     def __init__(self, master: Optional[tk.Frame],
                  callback: Callable[[Dict[str, Optional[Union[str, int]]]], None]
                  ) -> None:
-        """Create nested frames.
+        """Install translations, create nested frames and navigation buttons.
 
         :param master: master frame.
         :param callback: callback passed by Controller.
         """
+        gettext.install("FinanceAnalyzer", os.path.dirname(__file__), names=("ngettext", ))
         self.callback = callback
+        self.theme_info = None
+        self.windows = {}
         self.main_frame = self.fc(tk.Frame, master, "0:0.10", True)
         self.buttons_frame = self.fc(tk.Frame, master, "0:1.1", True)
-        self.accounting = self.fc(tk.Button, self.buttons_frame, "0:0", True, text=_("Accounting"),
-                                  command=lambda: self.callback({"type": "accounting_navigation",
-                                                                 "data": None}))
-        self.goals = self.fc(tk.Button, self.buttons_frame, "1:0", True, text=_("Goals"))
-        self.report = self.fc(tk.Button, self.buttons_frame, "2:0", True, text=_("Report"))
-        self.settings = self.fc(tk.Button, self.buttons_frame, "3:0", True, text=_("Settings"),
+        self.style = ttk.Style(master)
+        self.font = font.Font(master, name=self.font_name,
+                              exists=self.font_name in font.names(master))
+        self.accounting = self.fc(ttk.Button, self.buttons_frame, "0:0", True,
+                                  text=_("Accounting"),
+                                  command=lambda: self.window_accounting.navigate())
+        self.goals = self.fc(ttk.Button, self.buttons_frame, "1:0", True, text=_("Goals"),
+                             command=lambda: self.callback({"type": "goals_navigation",
+                                                            "data": None}))
+        self.report = self.fc(ttk.Button, self.buttons_frame, "2:0", True, text=_("Report"),
+                              command=lambda: self.callback({"type": "report_navigation",
+                                                             "data": None}))
+        self.settings = self.fc(ttk.Button, self.buttons_frame, "3:0", True, text=_("Settings"),
                                 command=lambda: self.callback({"type": "settings_navigation",
                                                                "data": None}))
         self.main_frame.rowconfigure(0, weight=1)
         self.main_frame.columnconfigure(0, weight=1)
-        self.window_accounting = WindowAccounting(self.main_frame, callback)
-        self.window_goals = WindowGoals(self.main_frame, callback)
-        self.window_report = WindowReport(self.main_frame, callback)
-        self.window_settings = WindowSettings(self.main_frame, callback)
 
-    def setup_theme(self, theme_info: Dict[str, str]) -> None:
-        """Change theme in all nested frames and store settings.
+    def __getattr__(self, name: str) -> tk.Frame:
+        """Get window by name, build it on first access.
+
+        :param name: window name.
+        """
+        if name not in self.window_classes:
+            raise AttributeError(name)
+        window = self.windows.get(name)
+        if window is None:
+            window = self.window_classes[name](self.main_frame, self.callback)
+            self.windows[name] = window
+            if self.theme_info is not None:
+                self.paint(window)
+        return window
+
+    def setup_theme(self, theme_info: Dict[str, str]) -> int:
+        """Change theme in shared styles and store settings.
+        Return number of touched objects.
 
         :param theme_info: theme settings.
         """
         self.theme_info = theme_info
-        self.window_accounting.configure(background=theme_info["background"])
-        self.window_goals.configure(background=theme_info["background"])
-        self.window_report.configure(background=theme_info["background"])
-        self.window_settings.configure(background=theme_info["background"])
-
-        self.accounting.configure(**theme_info)
-        self.goals.configure(**theme_info)
-        self.report.configure(**theme_info)
-        self.settings.configure(**theme_info)
-
-        self.window_accounting.comment.configure(**theme_info)
-        self.window_accounting.category.configure(**theme_info)
-        self.window_accounting.value.configure(**theme_info)
-        self.window_accounting.data.configure(**theme_info)
-        for entry in self.window_accounting.entries.values():
-            entry.configure(**theme_info)
-
-        for entry in self.window_settings.entries.values():
-            entry.configure(**theme_info)
-
+        background, foreground = theme_info["background"], theme_info["fg"]
+        self.font.configure(**font.Font(self.main_frame, font=theme_info["font"]).actual())
+        self.style.configure(".", background=background, foreground=foreground,
+                             fieldbackground=background, insertcolor=foreground,
+                             font=self.font_name)
+        touched = sum(self.paint(window) for window in self.windows.values())
         self.callback({"type": "theme_setup", "data": None})
+        return touched + 2
+
+    def paint(self, window: tk.Frame) -> int:
+        """Set theme background of window frames, which take no colors from styles.
+        Return number of touched frames.
+
+        :param window: built window.
+        """
+        frames = (window, window.canvas) if isinstance(window, WindowAccounting) else (window, )
+        for frame in frames:
+            frame.configure(background=self.theme_info["background"])
+        return len(frames)
 
     def __call__(self, window: str,
-                 data: Optional[Union[Iterable[Dict[str, Union[int, str, float]]],
-                                      Dict[str, str]]]) -> None:
-        """Pass data to draw in appropriate window.
+                 data: Optional[Union[Iterable[Batch], Batch, Dict[str, str]]],
+                 show: bool = True) -> int:
+        """Pass data to draw in appropriate window and return number of touched widgets.
 
         :param window: window to draw.
         :param data: data to draw.
+        :param show: switch to window, otherwise it is drawn without changing shown one.
         """
-        self.window_accounting.grid_remove()
-        self.window_goals.grid_remove()
-        self.window_report.grid_remove()
-        self.window_settings.grid_remove()
         if window == "window_main":
-            self.setup_theme(data)
-        else:
+            for built in self.windows.values():
+                built.grid_remove()
+            return self.setup_theme(data)
+        if show:
+            for built in self.windows.values():
+                built.grid_remove()
             getattr(self, window).grid(sticky="NEWS")
-            getattr(self, window)(data, self.theme_info)
+        return getattr(self, window)(data)
 
     @staticmethod
     def fc(cls: type, master: tk.Frame, geom: str = ":", draw: bool = False,
@@ -0,0 +1,156 @@
+"""Background thread running Model, so Tk mainloop never waits for database."""
+import queue
+import threading
+import traceback
+from typing import Optional, Dict, Union, Callable, Iterable, List, Tuple
+from . import Model
+from .Batch import Batch
+from .Trace import Tracer
+
+
+class Worker(threading.Thread):
+    """Thread owning Model and its sqlite connection.
+
+    Events are passed through queue and results are returned through another queue,
+    which Controller polls from Tk mainloop. Read-only events are passed on to reader
+    thread with its own Model, so long reports and exports do not delay edits.
+    """
+
+    def __init__(self, dbpath: str, coalesce: Iterable[str] = ("accounting_page", ),
+                 tracer: Optional[Tracer] = None,
+                 reads: Iterable[str] = ("report_query", "report_export", "accounting_export")
+                 ) -> None:
+        """Create queues, Models are created later in worker and reader threads.
+
+        :param dbpath: path to database.
+        :param coalesce: event types, for which only the latest queued event is processed.
+        :param tracer: tracer of event durations, events are not timed if None.
+        :param reads: read-only event types processed by reader thread.
+        """
+        super().__init__(name="FinanceAnalyzer-worker", daemon=True)
+        self.dbpath = dbpath
+        self.tracer = tracer
+        self.coalesce_types = set(coalesce)
+        self.read_types = set(reads)
+        self.events = queue.Queue()
+        self.reads = queue.Queue()
+        self.reader = threading.Thread(target=self.run_reads, name="FinanceAnalyzer-reader",
+                                       daemon=True)
+        self.results = queue.Queue()
+        self.submitted = {}
+
+    def submit(self, window: str, event: Dict[str, Optional[Union[str, int]]]) -> None:
+        """Queue event for Model.
+
+        :param window: the window in which the event occurred.
+        :param event: occurred event data.
+        """
+        if event["type"] in self.coalesce_types:
+            self.submitted[event["type"]] = self.submitted.get(event["type"], 0) + 1
+        self.events.put((window, event))
+
+    def stop(self) -> None:
+        """Process queued events, close Model and wait for thread end."""
+        self.events.put(None)
+        self.join()
+
+    def callback(self, window: str,
+                 data: Optional[Union[Iterable[Batch], Batch, Dict[str, str]]],
+                 event_type: Optional[str] = None, show: bool = True) -> None:
+        """Queue Model result for Controller.
+        Streamed batches are read here, because cursor can't leave its thread.
+        If events are timed, type of the event is queued too, so its drawing is timed.
+
+        :param window: window to draw.
+        :param data: data to draw.
+        :param event_type: type of event, which result is queued, passed if events are timed.
+        :param show: switch to window, False for results drawn into possibly hidden window.
+        """
+        if isinstance(data, Batch):
+            data.materialize()
+        elif isinstance(data, list):
+            for batch in data:
+                batch.materialize()
+        if self.tracer is None and show:
+            self.results.put((window, data))
+        else:
+            self.results.put((window, data, event_type, show))
+
+    def read_callback(self, window: str,
+                      data: Optional[Union[Iterable[Batch], Batch, Dict[str, str]]],
+                      event_type: Optional[str] = None) -> None:
+        """Queue result of read-only event, it is drawn without switching to its window.
+        Other window may be shown while the event waits for reader thread.
+
+        :param window: window to draw.
+        :param data: data to draw.
+        :param event_type: type of event, which result is queued, passed if events are timed.
+        """
+        self.callback(window, data, event_type, show=False)
+
+    def coalesce(self, events: List[Optional[Tuple[str, Dict[str, Optional[Union[str, int]]]]]]
+                 ) -> List[Optional[Tuple[str, Dict[str, Optional[Union[str, int]]]]]]:
+        """Drop events superseded by later events of the same type.
+
+        :param events: queued events.
+        """
+        latest = {}
+        for idx, item in enumerate(events):
+            if item is not None and item[1]["type"] in self.coalesce_types:
+                latest[item[1]["type"]] = idx
+        return [item for idx, item in enumerate(events)
+                if latest.get(item and item[1]["type"], idx) == idx]
+
+    def superseded(self, event_type: str) -> Callable[[], bool]:
+        """Create check if later event of the same type was submitted.
+
+        :param event_type: type of processed event.
+        """
+        seen = self.submitted.get(event_type)
+        return lambda: self.submitted.get(event_type) != seen
+
+    def run(self) -> None:
+        """Process queued events until stop.
+        Writes are committed before read-only event is passed on, so reader sees them.
+        """
+        model = Model.Model(self.callback, self.dbpath, tracer=self.tracer)
+        self.reader.start()
+        running = True
+        while running:
+            try:
+                events = [self.events.get(timeout=model.commit_interval)]
+            except queue.Empty:
+                model.flush(force=False)
+                continue
+            while True:
+                try:
+                    events.append(self.events.get_nowait())
+                except queue.Empty:
+                    break
+            for item in self.coalesce(events):
+                if item is None:
+                    running = False
+                    break
+                if item[1]["type"] in self.read_types:
+                    model.flush()
+                    self.reads.put(item)
+                    continue
+                if item[1]["type"] in self.coalesce_types:
+                    model.superseded = self.superseded(item[1]["type"])
+                try:
+                    model(*item)
+                except Exception:
+                    traceback.print_exc()
+        self.reads.put(None)
+        self.reader.join()
+        model.close()
+
+    def run_reads(self) -> None:
+        """Process read-only events until stop on Model, which never writes."""
+        model = Model.Model(self.read_callback, self.dbpath, tracer=self.tracer)
+        for item in iter(self.reads.get, None):
+            try:
+                model(*item)
+            except Exception:
+                traceback.print_exc()
+        model.close()
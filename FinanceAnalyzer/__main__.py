@@ -1,5 +1,5 @@
 """FinanceAnalyzer application launcher."""
-from .Controller import main
+from .Cli import main
 
 if __name__ == "__main__":
     main()
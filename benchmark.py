@@ -0,0 +1,226 @@
+"""Benchmark Model and View hot paths on synthetic ledgers.
+
+Results are written as JSON. If baseline is given, exit with error on regression.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import platform
+import subprocess
+from typing import Callable, Dict, List, Optional
+from FinanceAnalyzer import Model
+
+CATEGORIES = ("food", "rent", "transport", "salary", "health", "fun", "gifts", "taxes")
+
+
+def generate_ledger(path: str, rows: int, seed: int = 0, batch_size: int = 10000) -> None:
+    """Create database with deterministic random ledger, every fourth row is in EUR
+    with daily exchange rates.
+
+    :param path: path to database.
+    :param rows: number of rows.
+    :param seed: random generator seed.
+    :param batch_size: number of rows inserted at once.
+    """
+    rnd = random.Random(seed)
+    model = Model.Model(lambda window, data: None, path)
+    model.create_tables()
+    first_day = datetime.date(2010, 1, 1)
+    epoch = datetime.date(1970, 1, 1)
+    for start in range(0, rows, batch_size):
+        batch = []
+        for row_id in range(start, min(start + batch_size, rows)):
+            date = first_day + datetime.timedelta(days=rnd.randrange(15 * 365))
+            category = rnd.choice(CATEGORIES)
+            value = round(rnd.uniform(500, 5000) if category == "salary"
+                          else -rnd.uniform(1, 300), 2)
+            batch.append((row_id, f"item {row_id}", model.category_id(category), value,
+                          date.isoformat(), (date - epoch).days, "" if row_id % 4 else "EUR"))
+        model.cur.executemany(model.accounting_insert, batch)
+        model.update_rollups((row[2], row[3], row[5], row[6]) for row in batch)
+    start = (first_day - epoch).days
+    model.cur.executemany("INSERT INTO RATES VALUES ('EUR', ?, ?)",
+                          [(day, round(rnd.uniform(0.9, 1.3), 4))
+                           for day in range(start, start + 15 * 365)])
+    model.close()
+
+
+def measure(func: Callable[[], None], repeat: int) -> float:
+    """Get best time of function calls in seconds.
+
+    :param func: measured function.
+    :param repeat: number of calls.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_model(path: str, repeat: int) -> Dict[str, float]:
+    """Measure Model events on existing ledger.
+
+    :param path: path to database.
+    :param repeat: number of calls of each event.
+    """
+    results = {}
+    model = None
+
+    def start_setup():
+        nonlocal model
+        if model is not None:
+            model.close()
+        model = Model.Model(lambda window, data: None, path)
+        model("window_main", {"type": "start_setup", "data": None})
+
+    results["start_setup"] = measure(start_setup, repeat)
+
+    def first_paint():
+        start_setup()
+        model("window_main", {"type": "theme_setup", "data": None})
+
+    results["first_paint"] = measure(first_paint, repeat)
+
+    def uncached(window, event):
+        model.result_cache.clear()
+        model(window, event)
+
+    results["accounting_navigation"] = measure(lambda: model("window_accounting", {
+        "type": "accounting_navigation", "start": 0, "count": 30}), repeat)
+    results["accounting_page"] = measure(lambda: uncached("window_accounting", {
+        "type": "accounting_page", "fraction": 0.5, "count": 30}), repeat)
+    queries = iter(["food", "foo"] * repeat)
+    results["accounting_search"] = measure(lambda: uncached("window_accounting", {
+        "type": "accounting_page", "query": next(queries), "count": 30}), repeat)
+    last = model.cur.execute("SELECT MAX(id) FROM ACCOUNTING").fetchone()[0]
+    row = {"type": "accounting_update_row", "comment": "bench", "category": "food",
+           "value": -1.0, "date": "2020-01-01"}
+    results["accounting_update_row"] = measure(lambda: model("window_accounting", dict(
+        row, id=last // 2)), repeat)
+    results["accounting_add_row"] = measure(lambda: model("window_accounting", dict(
+        row, id=None)), repeat)
+    settings = iter(["white", "gray"] * repeat)
+    results["settings_update_row"] = measure(lambda: model("window_main", {
+        "type": "settings_update_row", "name": "Background color", "value": next(settings)}),
+        repeat)
+    results["report_month"] = measure(lambda: uncached("window_report", {
+        "type": "report_query", "start": "2015-03-01", "end": "2015-03-31"}), repeat)
+    results["report_all"] = measure(lambda: uncached("window_report", {
+        "type": "report_query", "start": "2010-01-01", "end": "2024-12-31"}), repeat)
+    export = os.path.join(os.path.dirname(path), "export.jsonl")
+    results["accounting_export"] = measure(lambda: model("window_accounting", {
+        "type": "accounting_export", "path": export, "category": "food"}), repeat)
+    results["report_all_cached"] = measure(lambda: model("window_report", {
+        "type": "report_query", "start": "2010-01-01", "end": "2024-12-31"}), repeat)
+    model.close()
+    model = Model.Model(lambda window, data: None, path, analytics=True)
+
+    def analytics_load():
+        model.analytics = None
+        model.analytics_cache()
+
+    results["analytics_load"] = measure(analytics_load, repeat)
+    results["report_all_analytics"] = measure(lambda: model("window_report", {
+        "type": "report_query", "start": "2010-01-01", "end": "2024-12-31"}), repeat)
+    model.close()
+    return results
+
+
+def bench_view(repeat: int) -> Dict[str, float]:
+    """Measure View theme setup, empty if there is no display.
+
+    :param repeat: number of calls.
+    """
+    import tkinter as tk
+    from FinanceAnalyzer import View
+    try:
+        root = tk.Tk()
+    except tk.TclError as error:
+        print(f"View is not measured: {error}", file=sys.stderr)
+        return {}
+    view = View.View(tk.Frame(root), lambda event: None)
+    themes = iter([{"background": "white", "fg": "black", "font": "Arial"},
+                   {"background": "gray", "fg": "black", "font": "Arial"}] * repeat)
+    result = {"setup_theme": measure(lambda: view.setup_theme(next(themes)), repeat)}
+    root.destroy()
+    return result
+
+
+def bench_import(repeat: int) -> Dict[str, float]:
+    """Measure import of GUI modules in fresh interpreter, as on application start.
+
+    :param repeat: number of interpreters.
+    """
+    code = ("import time; start = time.perf_counter(); import FinanceAnalyzer.Controller; "
+            "print(time.perf_counter() - start)")
+    directory = os.path.dirname(os.path.abspath(__file__))
+    return {"import": min(float(subprocess.run([sys.executable, "-c", code], cwd=directory,
+                                               check=True, capture_output=True,
+                                               text=True).stdout)
+                          for _ in range(repeat))}
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float, min_delta: float) -> List[str]:
+    """Find measurements slower than baseline more than tolerance times and min_delta seconds.
+
+    :param results: current results.
+    :param baseline: stored results.
+    :param tolerance: allowed slowdown factor.
+    :param min_delta: allowed slowdown in seconds, hides noise of very fast measurements.
+    """
+    regressions = []
+    stored = dict(baseline.get("sizes", {}), view=baseline.get("view", {}),
+                  startup=baseline.get("startup", {}))
+    for size, metrics in dict(results["sizes"], view=results["view"],
+                              startup=results["startup"]).items():
+        for name, seconds in metrics.items():
+            expected = stored.get(size, {}).get(name)
+            if expected is not None and seconds > max(expected * tolerance,
+                                                      expected + min_delta):
+                regressions.append(f"{name} on {size} rows: {seconds * 1000:.2f} ms, "
+                                   f"baseline {expected * 1000:.2f} ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run benchmarks.
+
+    :param argv: arguments without program name.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000],
+                        help="ledger sizes, e.g. 10000 100000 1000000")
+    parser.add_argument("--repeat", type=int, default=5, help="calls of each measured event")
+    parser.add_argument("--output", default="benchmark.json", help="results file")
+    parser.add_argument("--baseline", help="stored results to compare with")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="allowed slowdown factor")
+    parser.add_argument("--min-delta", type=float, default=0.001,
+                        help="allowed slowdown in seconds")
+    args = parser.parse_args(argv)
+    results = {"python": platform.python_version(), "sizes": {}}
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ledger.db")
+            generate_ledger(path, size)
+            results["sizes"][str(size)] = bench_model(path, args.repeat)
+    results["view"] = bench_view(args.repeat)
+    results["startup"] = bench_import(args.repeat)
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    print(json.dumps(results, indent=2))
+    if args.baseline:
+        with open(args.baseline) as stored:
+            regressions = compare(results, json.load(stored), args.tolerance, args.min_delta)
+        if regressions:
+            sys.exit("Regressions:\n" + "\n".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,14 @@ def task_test():
     }
 
 
+def task_bench():
+    """Run benchmarks and compare them with stored baseline."""
+    return {
+        "actions": ["python benchmark.py --baseline benchmark_baseline.json"],
+        "verbosity": 2,
+    }
+
+
 def task_pot():
     """Re-create .pot ."""
     return {
@@ -1,8 +1,22 @@
 """Test module."""
+import io
+import os
+import csv
+import json
+import sys
+import sqlite3
+import datetime
 import tempfile
 import unittest
+import threading
+import time
+import contextlib
+import subprocess
 import FinanceAnalyzer.Controller
 import FinanceAnalyzer.Model
+import FinanceAnalyzer.Worker
+import FinanceAnalyzer.Cli
+import FinanceAnalyzer.Trace
 
 
 class TestFinanceAnalyzer(unittest.TestCase):
@@ -17,9 +31,9 @@ class TestFinanceAnalyzer(unittest.TestCase):
 
     def test_0_create_tables(self):
         """Check initial content of tables."""
-        res = self.controller.model.cur.execute("SELECT * FROM ACCOUNTING ORDER BY id")
-        self.assertEqual(list(res), [(i, "", "", 0.0, "")
-                                     for i in range(self.controller.model.num_records_start)])
+        model = self.controller.model
+        res = model.cur.execute(f"{model.accounting_select} ORDER BY id")
+        self.assertEqual(list(res), [])
         res = self.controller.model.cur.execute("SELECT * FROM SETTINGS ORDER BY name")
         res = list(res)
         self.assertEqual(len(res), 3)
@@ -86,6 +100,951 @@ class TestFinanceAnalyzer(unittest.TestCase):
         res = list(res)[0][0]
         self.assertEqual(res, newcolor)
 
-    def cleanUp(self):
+    def test_5_lazy_windows(self):
+        """Check that only the first shown window is built and it is painted within budget."""
+        start = time.perf_counter()
+        self.controller.pass_event_to_model({"type": "start_setup", "data": None})
+        self.controller.main_window.update_idletasks()
+        self.assertLess(time.perf_counter() - start, TestStartup.draw_budget)
+        self.assertEqual(list(self.controller.view.windows), ["window_accounting"])
+        self.controller.pass_event_to_model({"type": "report_navigation", "data": None})
+        self.assertEqual(set(self.controller.view.windows), {"window_accounting",
+                                                             "window_report"})
+        self.assertEqual(self.controller.view.window_report["bg"], "white")
+
+    def test_6_background_result(self):
+        """Check that result of read-only event is drawn without switching shown window."""
+        self.controller.pass_event_to_model({"type": "start_setup", "data": None})
+        shown = self.controller.window
+        self.controller.draw_view("window_report", None, show=False)
+        self.assertEqual(self.controller.window, shown)
+        self.assertTrue(self.controller.view.window_accounting.grid_info())
+        self.assertFalse(self.controller.view.window_report.grid_info())
+
+    def test_7_completion_case(self):
+        """Check that completed category takes case of stored name."""
+        self.controller.pass_event_to_model({"type": "start_setup", "data": None})
+        self.controller.model.category_id("food")
+        window = self.controller.view.window_accounting
+        entry = window.entries[0, 1]
+        entry.insert(0, "F")
+        window.completing = 0, "F"
+        self.controller.pass_event_to_model({"type": "accounting_complete", "prefix": "F",
+                                             "row": 0, "count": 1})
+        self.assertEqual(entry.get(), "food")
+        self.assertEqual(entry.selection_get(), "ood")
+
+    def test_8_currency(self):
+        """Check that currency is shown in ledger and rates are set on report window."""
+        self.controller.pass_event_to_model({"type": "start_setup", "data": None})
+        self.controller.model("window_accounting", {
+            "type": "accounting_add_row", "comment": "hotel", "category": "trip", "value": -10,
+            "date": "2021-06-05", "currency": "eur"})
+        self.assertEqual(self.controller.view.window_accounting.entries[0, 4].get(), "EUR")
+        self.controller.pass_event_to_model({"type": "report_navigation", "data": None})
+        window = self.controller.view.window_report
+        for entry, text in zip((window.currency, window.rate_date, window.rate),
+                               ("eur", "2021-01-01", "2")):
+            entry.insert(0, text)
+        window.set_rate()
+        self.assertEqual(self.controller.model.cur.execute("SELECT * FROM RATES").fetchall(),
+                         [("EUR", 18628, 2.0)])
+        window.rate.delete(0, "end")
+        window.set_rate()
+        self.assertEqual(window.rate_status["text"], "Invalid rate")
+
+    def tearDown(self):
+        """Close model and temporary file after each test."""
+        self.controller.model.close()
+        self.dbfile.close()
+
+
+class TestModel(unittest.TestCase):
+    """Model test class, does not need display."""
+
+    def setUp(self):
+        """Create model on empty db before each test."""
+        self.dbfile = tempfile.NamedTemporaryFile()
+        self.results = []
+        self.model = FinanceAnalyzer.Model.Model(lambda w, d: self.results.append((w, d)),
+                                                 self.dbfile.name)
+        self.model.create_tables()
+
+    def fill(self, count):
+        """Insert empty rows with ids from 0 to count - 1 without passing them to View."""
+        self.model.cur.executemany(self.model.accounting_insert,
+                                   [(i, "", None, 0.0, "", None, "") for i in range(count)])
+        self.model.total_rows = None
+
+    def test_0_page(self):
+        """Check that only requested page of rows is passed to View."""
+        self.fill(20)
+        self.model("window_accounting", {"type": "accounting_page", "start": 15, "count": 3,
+                                         "direction": "forward", "offset": 15})
+        window, [data] = self.results[-1]
+        self.assertEqual(window, "window_accounting")
+        self.assertEqual((data.op, data.offset, data.total, [r[0] for r in data]),
+                         ("page", 15, 20, [15, 16, 17]))
+        self.model("window_accounting", {"type": "accounting_page", "start": 15, "count": 3,
+                                         "direction": "backward", "offset": 13})
+        self.assertEqual([r[0] for r in self.results[-1][1][0]], [13, 14, 15])
+        self.model("window_accounting", {"type": "accounting_page", "start": 1, "count": 3,
+                                         "direction": "backward", "offset": -1})
+        data = self.results[-1][1][0]
+        self.assertEqual((data.offset, [r[0] for r in data]), (0, [0, 1, 2]))
+        self.model("window_accounting", {"type": "accounting_page", "fraction": 1.0, "count": 3})
+        data = self.results[-1][1][0]
+        self.assertEqual((data.offset, [r[0] for r in data]), (17, [17, 18, 19]))
+        self.model("window_accounting", {"type": "accounting_page", "fraction": 1.0, "count": 3,
+                                         "reserve": 1})
+        data = self.results[-1][1][0]
+        self.assertEqual((data.offset, [r[0] for r in data]), (18, [18, 19]))
+
+    def test_1_append(self):
+        """Check that only real rows are stored and row without id is appended."""
+        row = {"type": "accounting_update_row", "id": None, "comment": "a", "category": "",
+               "value": 1.0, "date": ""}
+        self.model("window_accounting", row)
+        [appended] = self.results[-1][1]
+        self.assertEqual((appended.op, appended.total, list(appended)),
+                         ("appended", 1, [(0, "a", "", 1.0, "", "")]))
+        self.model("window_accounting", dict(row, id=0, comment="b"))
+        [changed] = self.results[-1][1]
+        self.assertEqual((changed.op, list(changed)), ("changed", [(0, "b", "", 1.0, "", "")]))
+        self.model("window_accounting", dict(row, id=0, comment="b", currency="eur"))
+        self.assertEqual(list(self.results[-1][1][0]), [(0, "b", "", 1.0, "", "EUR")])
+        self.model("window_accounting", row)
+        self.assertEqual([r[0] for r in self.results[-1][1][0]], [1])
+        self.assertEqual(self.model.cur.execute("SELECT COUNT(*) FROM ACCOUNTING").fetchone()[0],
+                         2)
+        self.assertEqual(self.model.accounting_total(), 2)
+
+    def test_2_delete(self):
+        """Check that deleted row is passed to View alone."""
+        self.fill(20)
+        self.model("window_accounting", {"type": "accounting_delete_row", "id": 5})
+        [data] = self.results[-1][1]
+        self.assertEqual((data.op, data.total, list(data)), ("deleted", 19, [(5, )]))
+        self.model("window_accounting", {"type": "accounting_page", "start": 4, "count": 2})
+        self.assertEqual([r[0] for r in self.results[-1][1][0]], [4, 6])
+
+    def test_3_write_batching(self):
+        """Check that writes are committed by operations window and on navigation."""
+        self.model.commit_ops, self.model.commit_interval = 2, 3600
+        self.model.flush()
+        reader = sqlite3.connect(self.dbfile.name)
+        row = {"type": "accounting_update_row", "id": 0, "comment": "a", "category": "",
+               "value": 1.0, "date": ""}
+        self.model("window_accounting", row)
+        self.assertIsNone(reader.execute("SELECT comment FROM ACCOUNTING WHERE id=0").fetchone())
+        self.model("window_accounting", dict(row, id=1))
+        self.assertEqual(reader.execute("SELECT comment FROM ACCOUNTING WHERE id=1").fetchone(),
+                         ("a", ))
+        self.model("window_accounting", dict(row, id=2))
+        self.model("window_settings", {"type": "settings_navigation", "data": None})
+        self.assertEqual(reader.execute("SELECT comment FROM ACCOUNTING WHERE id=2").fetchone(),
+                         ("a", ))
+        self.assertEqual(reader.execute("PRAGMA journal_mode").fetchone(), ("wal", ))
+        reader.close()
+
+    def test_4_report(self):
+        """Check report over period built from rollups."""
+        rows = [(0, "food", -10, "2021-01-31"), (1, "food", -5, "01.02.2021"),
+                (2, "salary", 100, "2021-02-15"), (3, "food", -1, "2021-03-01"),
+                (4, "food", -7, "bad date")]
+        for row_id, category, value, date in rows:
+            self.model("window_accounting", {"type": "accounting_update_row", "id": row_id,
+                                             "comment": "", "category": category,
+                                             "value": value, "date": date})
+        self.model("window_accounting", {"type": "accounting_update_row", "id": 2,
+                                         "comment": "", "category": "salary", "value": 200,
+                                         "date": "2021-02-15"})
+        self.model("window_report", {"type": "report_query", "start": "2021-01-31",
+                                     "end": "2021-03-01"})
+        window, data = self.results[-1]
+        self.assertEqual((window, list(data)), ("window_report", [("food", 0.0, 16.0),
+                                                                  ("salary", 200.0, 0.0)]))
+        self.model("window_report", {"type": "report_query", "start": "2021-02-01",
+                                     "end": "2021-02-28"})
+        self.assertEqual(list(self.results[-1][1]), [("food", 0.0, 5.0), ("salary", 200.0, 0.0)])
+        self.model("window_accounting", {"type": "accounting_delete_row", "id": 2})
+        self.model("window_report", {"type": "report_query", "start": "2021-02-02",
+                                     "end": "2021-12-31"})
+        self.assertEqual(list(self.results[-1][1]), [("food", 0.0, 1.0)])
+        for start, end in ("0001-01-01", "9999-12-31"), ("0001-01-02", "9999-12-30"):
+            self.model("window_report", {"type": "report_query", "start": start, "end": end})
+            self.assertEqual(list(self.results[-1][1]), [("food", 0.0, 16.0)])
+        self.model("window_report", {"type": "report_query", "start": "x", "end": "2021-12-31"})
+        self.assertEqual(self.results[-1][1].op, "invalid")
+        self.assertEqual(self.model.cur.execute("SELECT day FROM ACCOUNTING WHERE id IN (1, 4)"
+                                                ).fetchall(), [(18659, ), (None, )])
+        plan = self.model.cur.execute("EXPLAIN QUERY PLAN SELECT SUM(value) FROM ACCOUNTING "
+                                      "WHERE day BETWEEN 18000 AND 19000").fetchall()
+        self.assertIn("ACCOUNTING_DAY", plan[0][-1])
+
+    def test_5_import(self):
+        """Check import of statements to the end of ledger."""
+        statements = {".csv": "Date;Description;Amount;Category\n"
+                              "2021-06-01;Shop;-1 234,50;food\n"
+                              "bad;Skipped;1;food\n",
+                      ".qif": "!Type:Bank\nD06/02'21\nT-10.00\nPCafe\nLfood\n^\n",
+                      ".ofx": "<OFX><STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20210603120000"
+                              "<TRNAMT>500.00<NAME>Salary</STMTTRN></OFX>"}
+        progress = []
+        for suffix, text in statements.items():
+            with tempfile.NamedTemporaryFile("w", suffix=suffix) as statement:
+                statement.write(text)
+                statement.flush()
+                self.model.import_file(statement.name, progress.append)
+        self.assertEqual(progress, [1, 1, 1])
+        res = self.model.cur.execute(self.model.accounting_select + " ORDER BY id").fetchall()
+        self.assertEqual(res, [(0, "Shop", "food", -1234.5, "2021-06-01", ""),
+                               (1, "Cafe", "food", -10.0, "2021-06-02", ""),
+                               (2, "Salary", "", 500.0, "2021-06-03", "")])
+        self.model("window_report", {"type": "report_query", "start": "2021-06-01",
+                                     "end": "2021-06-30"})
+        self.assertEqual(list(self.results[-1][1]), [("", 500.0, 0.0), ("food", 0.0, 1244.5)])
+        self.model("window_accounting", {"type": "accounting_add_row", "comment": "cafe",
+                                         "category": "", "value": -1, "date": "2021-06-04"})
+        self.model("window_accounting", {"type": "accounting_page", "query": "caf", "count": 5})
+        self.assertEqual([row[0] for row in self.results[-1][1][0]], [1, 3])
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as statement:
+            statement.write("date,amount\n" + "2021-07-01,1\n" * 30)
+            statement.flush()
+            self.model.import_file(statement.name, batch_size=7)
+        self.assertEqual(self.model.accounting_total(), 34)
+        self.assertEqual(self.model.cur.execute("SELECT COUNT(*), MAX(id) FROM ACCOUNTING "
+                                                "WHERE value=1").fetchone(), (30, 33))
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as statement:
+            statement.write("Date,Description,Debit Amount,Credit Amount\n"
+                            "2021-08-01,Rent,500.00,\n2021-08-02,Refund,,20.00\n"
+                            "2021-08-03,Empty,,\n")
+            statement.flush()
+            self.assertEqual(self.model.import_file(statement.name), 2)
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as statement:
+            statement.write("Date,Amount\n2021-08-04,\n2021-08-05,-3\n")
+            statement.flush()
+            self.assertEqual(self.model.import_file(statement.name), 1)
+        res = self.model.cur.execute("SELECT comment, value FROM ACCOUNTING WHERE id > 33 "
+                                     "ORDER BY id").fetchall()
+        self.assertEqual(res, [("Rent", -500.0), ("Refund", 20.0), ("", -3.0)])
+
+    def test_6_settings_batch(self):
+        """Check that settings are streamed to View as compact batch."""
+        self.model("window_settings", {"type": "settings_navigation", "data": None})
+        window, data = self.results[-1]
+        self.assertEqual((window, data.columns), ("window_settings", ("name", "value")))
+        self.assertEqual(list(data), [("Background color", "white"), ("Font", "Arial"),
+                                      ("Text color", "black")])
+
+    def test_7_trace(self):
+        """Check that event durations and rows are recorded if tracer is given."""
+        self.fill(20)
+        self.model.tracer = FinanceAnalyzer.Trace.Tracer()
+        drawn = []
+        self.model.callback = lambda window, data, event_type: drawn.append(event_type)
+        for start in range(3):
+            self.model("window_accounting", {"type": "accounting_page", "start": start,
+                                             "count": 5})
+        self.assertEqual(drawn, ["accounting_page"] * 3)
+        self.model.tracer.record(drawn[-1], "draw", 0.002, widgets=20)
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            self.model.tracer.export(output.name)
+            summary = json.load(output)
+        self.assertEqual(list(summary), ["accounting_page"])
+        self.assertEqual(sorted(summary["accounting_page"]), ["draw", "payload", "sql"])
+        self.assertEqual(summary["accounting_page"]["payload"]["rows"], 15)
+        self.assertEqual(summary["accounting_page"]["sql"]["count"], 3)
+        self.assertGreater(summary["accounting_page"]["sql"]["total"], 0.0)
+        self.assertIsInstance(self.model.cur, FinanceAnalyzer.Trace.TimedCursor)
+        self.assertEqual(summary["accounting_page"]["draw"]["widgets"], 20)
+        self.assertEqual(summary["accounting_page"]["draw"]["p50"], 0.002)
+
+    def test_8_search(self):
+        """Check that search index follows edits and superseded search is dropped."""
+        self.fill(20)
+        for row_id, comment, category in ((3, "Lunch at cafe", "food"), (7, "taxi", "transport"),
+                                          (12, "lunch", "food"), (15, "cinema", "fun")):
+            self.model("window_accounting", {"type": "accounting_update_row", "id": row_id,
+                                             "comment": comment, "category": category,
+                                             "value": -1.0, "date": "2021-06-01"})
+
+        def search(query, **event):
+            self.model("window_accounting", dict(event, type="accounting_page", query=query,
+                                                 count=event.get("count", 5)))
+            return [(page.total, [row[0] for row in page]) for page in self.results[-1][1]]
+
+        self.assertEqual(search("lun"), [(2, [3, 12])])
+        self.assertEqual(search("FOOD lu"), [(2, [3, 12])])
+        self.assertEqual(search("foo", start=12, direction="backward", count=1), [(2, [12])])
+        self.assertEqual(search("f", fraction=1.0, count=1), [(3, [15])])
+        self.model("window_accounting", {"type": "accounting_update_row", "id": 3,
+                                         "comment": "dinner", "category": "food",
+                                         "value": -1.0, "date": "2021-06-01"})
+        self.model("window_accounting", {"type": "accounting_delete_row", "id": 12})
+        self.assertEqual(search("lunch"), [(0, [])])
+        self.assertEqual(search("dinner food"), [(1, [3])])
+        self.assertEqual(search(""), [(19, [0, 1, 2, 3, 4])])
+        self.model.cur.executemany(self.model.accounting_insert,
+                                   [(i, "food", None, 0.0, "", None, "")
+                                    for i in range(100, 1100)])
+        self.model.superseded = lambda: True
+        self.assertEqual(search("food"), [])
+        self.model.superseded = None
+        self.model.search_source = self.model.like_source
+        self.assertEqual(search("cin"), [(1, [15])])
+        self.assertEqual(search("ne", count=2), [(2, [3, 15])])
+
+    def test_9_categories(self):
+        """Check that categories are stored once and completed from cache."""
+        for row_id, category in enumerate(("food", " Fun", "food", "", "fuel", "rent")):
+            self.model("window_accounting", {"type": "accounting_update_row", "id": row_id,
+                                             "comment": "", "category": category,
+                                             "value": -1.0, "date": "2021-06-01"})
+        self.assertEqual(list(self.model.cur.execute("SELECT * FROM CATEGORIES")),
+                         [(1, "food"), (2, "Fun"), (3, "fuel"), (4, "rent")])
+        rows = self.model.cur.execute(f"{self.model.accounting_select} WHERE id < 4 ORDER BY id")
+        self.assertEqual([row[2] for row in rows], ["food", "Fun", "food", ""])
+        self.model("window_accounting", {"type": "accounting_complete", "prefix": "F", "row": 7})
+        [completion] = self.results[-1][1]
+        self.assertEqual((completion.op, completion.offset, list(completion)),
+                         ("completion", 7, [("food", ), ("fuel", ), ("Fun", )]))
+        self.model("window_accounting", {"type": "accounting_complete", "prefix": "fu",
+                                         "count": 1})
+        self.assertEqual(list(self.results[-1][1][0]), [("fuel", )])
+        self.model("window_report", {"type": "report_query", "start": "2021-06-01",
+                                     "end": "2021-06-01"})
+        self.assertEqual(list(self.results[-1][1]), [("", 0.0, 1.0), ("Fun", 0.0, 1.0),
+                                                     ("food", 0.0, 2.0), ("fuel", 0.0, 1.0),
+                                                     ("rent", 0.0, 1.0)])
+
+    def test_10_migrate_categories(self):
+        """Check that ledger with category text is converted to category keys."""
+        self.model.close()
+        with tempfile.NamedTemporaryFile() as dbfile:
+            con = sqlite3.connect(dbfile.name)
+            con.execute("CREATE TABLE ACCOUNTING"
+                        "(id integer, comment text, category text, value real, date text)")
+            con.executemany("INSERT INTO ACCOUNTING VALUES (?, ?, ?, ?, ?)",
+                            [(0, "bread", "food", -2.0, "2021-06-01"),
+                             (1, "salary", "work ", 100.0, "02.06.2021"),
+                             (2, "milk", "food", -1.0, "2021-06-03"), (3, "", "", 0.0, "")])
+            con.execute("CREATE TABLE SETTINGS(name text, value text)")
+            con.commit()
+            con.close()
+            model = FinanceAnalyzer.Model.Model(lambda w, d: self.results.append((w, d)),
+                                                dbfile.name)
+            model("window_main", {"type": "start_setup", "data": None})
+            self.assertEqual(list(model.cur.execute(f"{model.accounting_select} ORDER BY id")),
+                             [(0, "bread", "food", -2.0, "2021-06-01", ""),
+                              (1, "salary", "work", 100.0, "02.06.2021", ""),
+                              (2, "milk", "food", -1.0, "2021-06-03", "")])
+            model("window_report", {"type": "report_query", "start": "2021-06-01",
+                                    "end": "2021-06-30"})
+            self.assertEqual(list(self.results[-1][1]), [("food", 0.0, 3.0),
+                                                         ("work", 100.0, 0.0)])
+            model("window_accounting", {"type": "accounting_page", "query": "food"})
+            self.assertEqual([row[0] for row in self.results[-1][1][0]], [0, 2])
+            model.close()
+
+    def test_11_analytics(self):
+        """Check that analytics cache is patched by writes and agrees with rollups."""
+        rows = [("food", -10, "2021-01-31"), ("food", -5, "01.02.2021"),
+                ("salary", 100, "2021-02-15"), ("", -1, "2021-03-01"), ("food", -7, "bad")]
+        for category, value, date in rows:
+            self.model("window_accounting", {"type": "accounting_add_row", "comment": "",
+                                             "category": category, "value": value,
+                                             "date": date})
+        self.model.flush()
+        cached = FinanceAnalyzer.Model.Model(lambda w, d: self.results.append((w, d)),
+                                             self.dbfile.name, analytics=True)
+        self.assertEqual(len(cached.analytics_cache()), 5)
+        cached("window_accounting", {"type": "accounting_update_row", "id": 2, "comment": "",
+                                     "category": "salary", "value": 200, "date": "2021-02-15"})
+        cached("window_accounting", {"type": "accounting_delete_row", "id": 0})
+        cached("window_accounting", {"type": "accounting_add_row", "comment": "",
+                                     "category": "fun", "value": "x", "date": "2021-03-02"})
+        cached.flush()
+        reports = []
+        for model in self.model, cached:
+            model("window_report", {"type": "report_query", "start": "2021-01-01",
+                                    "end": "2021-12-31"})
+            reports.append(list(self.results[-1][1]))
+        self.assertIsNone(self.model.analytics)
+        self.assertEqual(reports[0], reports[1])
+        self.assertEqual(reports[1], [("", 0.0, 1.0), ("food", 0.0, 5.0), ("salary", 200.0, 0.0)])
+        analytics = cached.analytics_cache()
+        self.assertEqual(analytics.by_month(18659, 18687),
+                         {24253: (200.0, 5.0), 24254: (0.0, 1.0)})
+        self.assertEqual((analytics.balance(), analytics.balance(18689)), (187.0, 194.0))
+        self.assertEqual(list(analytics.ids), [1, 2, 3, 4, 5])
+        cached.close()
+
+    def test_12_result_cache(self):
+        """Check that repeated reads are cached until written tables change."""
+        self.model("window_main", {"type": "theme_setup"})
+        self.assertEqual(self.results[-1][0], "window_accounting")
+        settings = {"type": "settings_navigation", "data": None}
+        self.model("window_settings", settings)
+        self.model("window_settings", settings)
+        self.assertEqual(self.model.cache_stats()["hits"], 1)
+        self.model("window_main", {"type": "settings_update_row", "name": "Font",
+                                   "value": "Courier"})
+        self.model("window_main", {"type": "theme_setup"})
+        window, data = self.results[-1]
+        self.assertEqual((window, dict(data)["Font"]), ("window_settings", "Courier"))
+        report = {"type": "report_query", "start": "2021-06-01", "end": "2021-06-30"}
+        stats = self.model.cache_stats()
+        self.model("window_report", report)
+        self.model("window_report", report)
+        self.assertEqual((self.model.cache_stats()["hits"], self.model.cache_stats()["misses"]),
+                         (stats["hits"] + 1, stats["misses"] + 1))
+        self.model("window_accounting", {"type": "accounting_add_row", "comment": "",
+                                         "category": "food", "value": -1, "date": "2021-06-02"})
+        self.model("window_report", report)
+        self.assertEqual(list(self.results[-1][1]), [("food", 0.0, 1.0)])
+        self.model.flush()
+        other = sqlite3.connect(self.dbfile.name)
+        other.execute("UPDATE SETTINGS SET value='Arial' WHERE name='Font'")
+        other.commit()
+        other.close()
+        self.model("window_settings", settings)
+        self.assertEqual(dict(self.results[-1][1])["Font"], "Arial")
+        self.model.result_cache.clear()
+        self.model.cache_bytes = 0
+        periods = [dict(report, end=end) for end in ("2021-06-28", "2021-06-29", "2021-06-30")]
+        for period in periods[0], periods[1], periods[0]:
+            self.model("window_report", period)
+        self.model.cache_size = self.model.cache_bytes
+        self.model("window_report", periods[2])
+        self.assertEqual(self.model.cache_stats()["entries"], 2)
+        stats = self.model.cache_stats()
+        self.model("window_report", periods[0])
+        self.model("window_report", periods[1])
+        self.assertEqual((self.model.cache_stats()["hits"], self.model.cache_stats()["misses"]),
+                         (stats["hits"] + 1, stats["misses"] + 1))
+
+    def test_13_goals(self):
+        """Check that savings are allocated to goals from incrementally kept balance."""
+        for value in 100, -30, "bad", 50:
+            self.model("window_accounting", {"type": "accounting_add_row", "comment": "",
+                                             "category": "", "value": value, "date": ""})
+        for name, price in ("bike", 80), ("phone", "100"), ("car", 1000):
+            self.model("window_goals", {"type": "goals_update_row", "id": None, "name": name,
+                                        "price": price})
+        window, data = self.results[-1]
+        self.assertEqual((window, data.total, list(data)),
+                         ("window_goals", 120.0, [(1, "bike", 80.0, 80.0),
+                                                  (2, "phone", 100.0, 40.0),
+                                                  (3, "car", 1000.0, 0.0)]))
+        self.model("window_accounting", {"type": "accounting_update_row", "id": 1,
+                                         "comment": "", "category": "", "value": -10,
+                                         "date": ""})
+        self.model("window_accounting", {"type": "accounting_delete_row", "id": 3})
+        self.model("window_goals", {"type": "goals_delete_row", "id": 1})
+        self.model("window_goals", {"type": "goals_update_row", "id": 3, "name": "car",
+                                    "price": 50})
+        data = self.results[-1][1]
+        self.assertEqual((data.total, list(data)), (90.0, [(2, "phone", 100.0, 90.0),
+                                                           (3, "car", 50.0, 0.0)]))
+        self.model.flush()
+        self.assertEqual(self.model.cur.execute("SELECT value FROM BALANCE").fetchone(), (90.0, ))
+        self.model.cur.execute("DROP TABLE BALANCE")
+        self.model.cur.execute("DROP TABLE GOALS")
+        self.model.migrate_tables()
+        self.assertEqual(self.model.balance(), 90.0)
+
+    def test_14_export(self):
+        """Check streaming export of filtered rows and report to CSV and JSON Lines."""
+        rows = [("Lunch 50%", "food", -10, "2021-06-01"), ("taxi", "", -5, "2021-06-02"),
+                ("lunch", "food", -7, "2021-07-01"), ("salary", "work", 100, "2021-06-03")]
+        for comment, category, value, date in rows:
+            self.model("window_accounting", {"type": "accounting_add_row", "comment": comment,
+                                             "category": category, "value": value,
+                                             "date": date})
+        self.model.export_batch = 2
+        with tempfile.TemporaryDirectory() as directory:
+            path = f"{directory}/ledger.jsonl"
+            self.model("window_accounting", {"type": "accounting_export", "path": path,
+                                             "start": "2021-06-01", "end": "30.06.2021"})
+            self.assertEqual(list(self.results[-1][1][0]), [(3, )])
+            with open(path, encoding="utf-8") as exported:
+                self.assertEqual([json.loads(line)["id"] for line in exported], [0, 1, 3])
+            for event, ids in (({"category": "food", "comment": "%"}, ["0"]),
+                               ({"category": ""}, ["1"]), ({"category": "fun"}, []),
+                               ({"comment": "LUNCH", "format": "csv"}, ["0", "2"])):
+                self.model("window_accounting", dict(event, type="accounting_export",
+                                                     path=f"{directory}/ledger.txt"))
+                with open(f"{directory}/ledger.txt", encoding="utf-8") as exported:
+                    self.assertEqual([row[0] for row in csv.reader(exported)], ["id", *ids])
+            self.model("window_accounting", {"type": "accounting_export", "path": path,
+                                             "start": "bad"})
+            self.assertEqual(self.results[-1][1][0].op, "invalid")
+            self.model("window_report", {"type": "report_export", "start": "2021-06-01",
+                                         "end": "2021-06-30", "path": f"{directory}/r.csv"})
+            self.assertEqual(list(self.results[-1][1]), [(3, )])
+            with open(f"{directory}/r.csv", encoding="utf-8") as exported:
+                self.assertEqual(list(csv.reader(exported)),
+                                 [["category", "income", "expenses"], ["", "0.0", "5.0"],
+                                  ["food", "0.0", "10.0"], ["work", "100.0", "0.0"]])
+
+    def test_15_partitions(self):
+        """Check that closed years are moved to databases attached read-only on demand."""
+        this_year = datetime.date.today().year
+        with tempfile.TemporaryDirectory() as directory:
+            self.model.close()
+            self.model = FinanceAnalyzer.Model.Model(lambda w, d: self.results.append((w, d)),
+                                                     f"{directory}/ledger.db")
+            self.model.create_tables()
+            for date, category, value in (("2019-03-01", "food", -10), ("2019-12-31", "work", 100),
+                                          ("2020-01-01", "food", -5),
+                                          (f"{this_year}-01-02", "food", -1), ("", "food", -2)):
+                self.model("window_accounting", {"type": "accounting_add_row", "comment": "",
+                                                 "category": category, "value": value,
+                                                 "date": date})
+
+            def report(start="2019-01-01", end=f"{this_year}-12-31"):
+                self.model("window_report", {"type": "report_query", "start": start, "end": end})
+                return list(self.results[-1][1])
+
+            expected = report()
+            self.assertEqual([self.model.archive_year(year) for year in (2019, 2020)], [2, 1])
+            self.assertRaises(ValueError, self.model.archive_year, this_year)
+            self.assertTrue(os.path.exists(f"{directory}/ledger.2019.db"))
+            self.model("window_accounting", {"type": "accounting_page"})
+            page = self.results[-1][1][0]
+            self.assertEqual((page.total, [row[0] for row in page]), (2, [3, 4]))
+            self.assertEqual(report(f"{this_year}-01-01"), [("food", 0.0, 1.0)])
+            self.assertEqual([list(years) for years in self.model.attached.values()], [[]])
+            self.assertEqual(report(), expected)
+            (reader, years), = self.model.attached.items()
+            self.assertEqual(list(years), [2019, 2020])
+            self.assertRaises(sqlite3.OperationalError, reader.execute,
+                              "DELETE FROM y2019.ACCOUNTING")
+            self.model.attach_limit = 1
+            self.assertEqual(report(end=f"{this_year}-12-30"), expected)
+            self.model("window_accounting", {"type": "accounting_add_row", "comment": "late",
+                                             "category": "food", "value": -3,
+                                             "date": "2019-05-05"})
+            self.assertEqual(list(self.results[-1][1][0])[0][0], 5)
+            self.assertEqual(self.model.archive_year(2019), 1)
+            self.assertEqual(report("2019-01-01", "2019-12-31"), [("food", 0.0, 13.0),
+                                                                  ("work", 100.0, 0.0)])
+            self.model("window_accounting", {"type": "accounting_export",
+                                             "path": f"{directory}/all.csv"})
+            with open(f"{directory}/all.csv", encoding="utf-8") as exported:
+                self.assertEqual(sorted(row[0] for row in csv.reader(exported)),
+                                 ["0", "1", "2", "3", "4", "5", "id"])
+            self.model.close()
+            cached = FinanceAnalyzer.Model.Model(lambda w, d: self.results.append((w, d)),
+                                                 f"{directory}/ledger.db", analytics=True)
+            cached("window_report", {"type": "report_query", "start": "2019-01-01",
+                                     "end": f"{this_year}-12-31"})
+            self.assertEqual(list(self.results[-1][1]), [("food", 0.0, 19.0),
+                                                         ("work", 100.0, 0.0)])
+            self.assertEqual(list(cached.analytics.ids), [0, 1, 2, 3, 4, 5])
+            cached.close()
+
+    def test_16_readers(self):
+        """Check that reads run on read-only snapshots while writer commits edits."""
+        self.model.close()
+        self.model = FinanceAnalyzer.Model.Model(lambda w, d: self.results.append((w, d)),
+                                                 self.dbfile.name, mmap_size=2 ** 20)
+        add = {"type": "accounting_add_row", "comment": "", "category": "food", "value": -1,
+               "date": "2021-06-01"}
+        report = {"type": "report_query", "start": "2021-06-01", "end": "2021-06-30"}
+        for _ in range(3):
+            self.model("window_accounting", add)
+        self.model.flush()
+        with self.model.readers.connection() as con:
+            self.assertEqual(con.execute("PRAGMA mmap_size").fetchone()[0], 2 ** 20)
+            self.assertRaises(sqlite3.OperationalError, con.execute,
+                              "DELETE FROM ACCOUNTING")
+            rows = con.execute("SELECT id FROM ACCOUNTING ORDER BY id")
+            self.assertEqual(rows.fetchmany(2), [(0, ), (1, )])
+            self.model("window_accounting", add)
+            self.model("window_report", report)
+            self.assertEqual(list(self.results[-1][1]), [("food", 0.0, 4.0)])
+            self.assertEqual(rows.fetchall(), [(2, )])
+        self.assertEqual(len(self.model.readers.connections), 2)
+        self.model.close()
+        self.model = FinanceAnalyzer.Model.Model(lambda w, d: self.results.append((w, d)),
+                                                 self.dbfile.name, readers=0)
+        self.assertIsNone(self.model.readers)
+        self.model("window_report", report)
+        self.assertEqual(list(self.results[-1][1]), [("food", 0.0, 4.0)])
+        other = FinanceAnalyzer.Model.Model(lambda w, d: None, self.dbfile.name)
+        other("window_accounting", dict(add, category="rent"))
+        other.close()
+        self.model("window_report", report)
+        self.assertEqual(list(self.results[-1][1]), [("food", 0.0, 4.0), ("rent", 0.0, 1.0)])
+        self.assertEqual(self.model.accounting_total(), 5)
+
+    def test_17_archived_report(self):
+        """Check that reports over archived years match ones before archiving.
+        Reports aggregated by worker processes are identical to serial ones.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            self.model.close()
+            self.model = FinanceAnalyzer.Model.Model(lambda w, d: self.results.append((w, d)),
+                                                     f"{directory}/ledger.db")
+            self.model.create_tables()
+            for i in range(60):
+                self.model("window_accounting", {
+                    "type": "accounting_add_row", "comment": "", "value": -0.1 * i - 0.01,
+                    "category": ("food", "rent", "")[i % 3],
+                    "date": f"{2018 + i % 4}-{i % 12 + 1:02}-{i % 28 + 1:02}"})
+
+            def report(start, end):
+                self.model("window_report", {"type": "report_query", "start": start,
+                                             "end": end})
+                return [(category, income, round(expenses, 6))
+                        for category, income, expenses in self.results[-1][1]]
+
+            before = report("2018-02-03", "2021-11-20")
+            self.model.archive_year(2018)
+            self.model.archive_year(2019)
+            self.assertEqual(report("2019-01-01", "2019-06-30")[0][0], "")
+            self.assertEqual(report("2018-02-03", "2021-11-20"), before)
+            self.assertEqual(len(before), 3)
+            serial = list(self.results[-1][1])
+            self.model.workers = 2
+            self.assertEqual(report("2019-01-01", "2019-06-30")[0][0], "")
+            self.assertIsNone(self.model.executor)
+            report("2018-02-03", "2021-11-20")
+            self.assertIsNotNone(self.model.executor)
+            self.assertEqual(list(self.results[-1][1]), serial)
+
+    def test_18_currencies(self):
+        """Check that reports and balance convert values by rates as of their days."""
+        for category, value, date, currency in (("food", -10, "2021-06-01", ""),
+                                                ("food", -10, "2021-06-01", "eur"),
+                                                ("food", -10, "2021-06-20", "EUR"),
+                                                ("work", 100, "2021-06-10", "USD")):
+            self.model("window_accounting", {"type": "accounting_add_row", "comment": "",
+                                             "category": category, "value": value,
+                                             "date": date, "currency": currency})
+        for date, rate in ("2021-06-15", 1.2), ("2021-01-01", "1.1"), ("bad", 1.0):
+            self.model("window_report", {"type": "rates_update_row", "currency": "EUR",
+                                         "date": date, "rate": rate})
+        self.assertEqual(self.results[-1][1].op, "invalid")
+        self.model("window_accounting", {"type": "accounting_update_row", "id": 1,
+                                         "comment": "x", "category": "food", "value": -20,
+                                         "date": "2021-06-01"})
+        report = {"type": "report_query", "start": "2021-06-01", "end": "2021-06-30"}
+        self.model("window_report", report)
+        [food, work] = self.results[-1][1]
+        self.assertAlmostEqual(food[2], 10 + 20 * 1.1 + 10 * 1.2)
+        self.assertEqual(work, ("work", 100.0, 0.0))
+        self.assertAlmostEqual(self.model.balance(), -10 - 30 * 1.2 + 100)
+        self.model.flush()
+        cached = FinanceAnalyzer.Model.Model(lambda w, d: self.results.append((w, d)),
+                                             self.dbfile.name, analytics=True)
+        cached("window_report", report)
+        self.assertEqual([row[0] for row in self.results[-1][1]], ["food", "work"])
+        self.assertAlmostEqual(self.results[-1][1].rows[0][2], food[2])
+        cached("window_report", {"type": "rates_update_row", "currency": "EUR",
+                                 "date": "2021-06-01", "rate": 2})
+        cached("window_report", report)
+        self.assertAlmostEqual(self.results[-1][1].rows[0][2], 10 + 20 * 2 + 10 * 1.2)
+        self.assertAlmostEqual(cached.analytics.balance(18790), -10 - 20 * 2 + 100)
+        cached.close()
+
+    def test_19_migrate_day_schema(self):
+        """Check that ledger with indexed day column and category text is converted."""
+        self.model.close()
+        with tempfile.NamedTemporaryFile() as dbfile:
+            con = sqlite3.connect(dbfile.name)
+            con.execute("CREATE TABLE ACCOUNTING (id integer PRIMARY KEY, comment text, "
+                        "category text, value real, date text, day integer)")
+            con.execute("CREATE INDEX ACCOUNTING_DAY ON ACCOUNTING(day, category)")
+            con.executemany("INSERT INTO ACCOUNTING VALUES (?, ?, ?, ?, ?, ?)",
+                            [(0, "bread", "food", -2.0, "2021-06-01", 18779),
+                             (1, "salary", "work", 100.0, "2021-06-02", 18780)])
+            for table, period in ("ROLLUP_DAILY", "day"), ("ROLLUP_MONTHLY", "month"):
+                con.execute(f"CREATE TABLE {table} ({period} integer, category text, "
+                            f"income real, expenses real, PRIMARY KEY ({period}, category))")
+            con.execute("CREATE TABLE SETTINGS(name text, value text)")
+            con.commit()
+            con.close()
+            model = FinanceAnalyzer.Model.Model(lambda w, d: self.results.append((w, d)),
+                                                dbfile.name)
+            model("window_main", {"type": "start_setup", "data": None})
+            model("window_report", {"type": "report_query", "start": "2021-06-01",
+                                    "end": "2021-06-30"})
+            self.assertEqual(list(self.results[-1][1]), [("food", 0.0, 2.0),
+                                                         ("work", 100.0, 0.0)])
+            self.assertEqual(model.cur.execute("SELECT tbl_name FROM sqlite_master "
+                                               "WHERE name='ACCOUNTING_DAY'").fetchall(),
+                             [("ACCOUNTING", )])
+            model.close()
+
+    def test_20_migrate_archived_currency(self):
+        """Check that archived years of ledger without currencies are migrated with it."""
+        this_year = datetime.date.today().year
+        with tempfile.TemporaryDirectory() as directory:
+            self.model.close()
+            self.model = FinanceAnalyzer.Model.Model(lambda w, d: self.results.append((w, d)),
+                                                     f"{directory}/ledger.db")
+            self.model.create_tables()
+            for date, category, value in (("2019-03-01", "food", -10), ("2019-12-31", "work", 100),
+                                          (f"{this_year}-01-02", "food", -100)):
+                self.model("window_accounting", {"type": "accounting_add_row", "comment": "",
+                                                 "category": category, "value": value,
+                                                 "date": date})
+            self.model.archive_year(2019)
+            self.model.close()
+            for path in f"{directory}/ledger.db", f"{directory}/ledger.2019.db":
+                con = sqlite3.connect(path)
+                con.execute("ALTER TABLE ACCOUNTING DROP COLUMN currency")
+                for table, period in ("ROLLUP_DAILY", "day"), ("ROLLUP_MONTHLY", "month"):
+                    con.execute(f"DROP TABLE {table}")
+                    con.execute(f"CREATE TABLE {table} ({period} integer, "
+                                "category_id integer, income real, expenses real, "
+                                f"PRIMARY KEY ({period}, category_id))")
+                con.execute("DROP TABLE IF EXISTS BALANCE")
+                con.execute("PRAGMA user_version=1")
+                con.commit()
+                con.close()
+            self.model = FinanceAnalyzer.Model.Model(lambda w, d: self.results.append((w, d)),
+                                                     f"{directory}/ledger.db")
+            self.model("window_main", {"type": "start_setup", "data": None})
+            self.model("window_report", {"type": "report_query", "start": "2019-01-01",
+                                         "end": f"{this_year}-12-31"})
+            self.assertEqual(list(self.results[-1][1]), [("food", 0.0, 110.0),
+                                                         ("work", 100.0, 0.0)])
+            self.assertAlmostEqual(self.model.balance(), -10.0)
+            self.model("window_accounting", {"type": "accounting_export",
+                                             "path": f"{directory}/all.csv"})
+            with open(f"{directory}/all.csv", encoding="utf-8") as exported:
+                self.assertEqual(sorted(row[0] for row in csv.reader(exported)),
+                                 ["0", "1", "2", "id"])
+            self.model.close()
+
+    def test_21_import_rollback(self):
+        """Check that import failing after the first batch leaves ledger unchanged."""
+        self.model("window_accounting", {"type": "accounting_add_row", "comment": "cafe",
+                                         "category": "food", "value": -1, "date": "2021-06-01"})
+        report = {"type": "report_query", "start": "2021-06-01", "end": "2021-06-30"}
+        progress = []
+        with tempfile.NamedTemporaryFile("wb", suffix=".csv") as statement:
+            statement.write(b"date,amount,category\n" + b"2021-06-02,5,work\n" * 2000 + b"\xff\n")
+            statement.flush()
+            self.assertRaises(UnicodeDecodeError, self.model.import_file, statement.name,
+                              progress.append, 100)
+            self.model("window_accounting", {"type": "accounting_import",
+                                             "path": statement.name})
+            self.assertEqual(self.results[-1][1][0].op, "error")
+        self.assertEqual(progress[0], 100)
+        self.model.flush()
+        self.assertEqual(self.model.accounting_total(), 1)
+        self.assertEqual(self.model.cur.execute("SELECT COUNT(*) FROM ACCOUNTING").fetchone(),
+                         (1, ))
+        self.model("window_report", report)
+        self.assertEqual(list(self.results[-1][1]), [("food", 0.0, 1.0)])
+        self.assertEqual(self.model.balance(), -1.0)
+        self.assertNotIn("work", self.model.categories())
+        self.model("window_accounting", {"type": "accounting_add_row", "comment": "cafe",
+                                         "category": "", "value": -2, "date": "2021-06-03"})
+        self.model("window_accounting", {"type": "accounting_page", "query": "caf", "count": 5})
+        self.assertEqual([row[0] for row in self.results[-1][1][0]], [0, 1])
+
+    def tearDown(self):
+        """Close model and temporary file after each test."""
+        self.model.close()
+        self.dbfile.close()
+
+
+class TestWorker(unittest.TestCase):
+    """Background Model test class, does not need display."""
+
+    def setUp(self):
+        """Create worker on empty db before each test."""
+        self.dbfile = tempfile.NamedTemporaryFile()
+        self.worker = FinanceAnalyzer.Worker.Worker(self.dbfile.name)
+
+    def test_0_coalesce(self):
+        """Check that only the latest of queued page requests is processed."""
+        self.worker.submit("window_main", {"type": "start_setup", "data": None})
+        for row_id in range(6):
+            self.worker.submit("window_accounting", {"type": "accounting_add_row",
+                                                     "comment": str(row_id), "category": "",
+                                                     "value": 0.0, "date": ""})
+        for start in range(5):
+            self.worker.submit("window_accounting", {"type": "accounting_page", "start": start,
+                                                     "count": 2})
+        self.worker.start()
+        self.worker.stop()
+        window, theme = self.worker.results.get_nowait()
+        self.assertEqual(theme, {"background": "white", "fg": "black", "font": "Arial"})
+        for _ in range(6):
+            self.worker.results.get_nowait()
+        window, [data] = self.worker.results.get_nowait()
+        self.assertEqual(list(data), [(4, "4", "", 0.0, "", ""), (5, "5", "", 0.0, "", "")])
+        self.assertTrue(self.worker.results.empty())
+
+    def test_1_reader_thread(self):
+        """Check that reports run on reader thread and see edits submitted before them."""
+        threads = []
+        callback = self.worker.callback
+        self.worker.callback = lambda window, data, *args, **options: (
+            threads.append((window, threading.current_thread().name)),
+            callback(window, data, *args, **options))
+        self.worker.submit("window_main", {"type": "start_setup", "data": None})
+        self.worker.submit("window_accounting", {"type": "accounting_add_row", "comment": "",
+                                                 "category": "food", "value": -5.0,
+                                                 "date": "2021-06-01"})
+        self.worker.submit("window_report", {"type": "report_query", "start": "2021-06-01",
+                                             "end": "2021-06-30"})
+        self.worker.start()
+        self.worker.stop()
+        self.assertEqual(threads[-1], ("window_report", "FinanceAnalyzer-reader"))
+        results = [self.worker.results.get_nowait() for _ in range(3)]
+        self.assertEqual(list(results[-1][1]), [("food", 0.0, 5.0)])
+        self.assertEqual(results[-1][2:], (None, False))
+
+    def test_2_traced_results(self):
+        """Check that results of writer and reader threads carry types of their events."""
+        self.worker = FinanceAnalyzer.Worker.Worker(self.dbfile.name,
+                                                    tracer=FinanceAnalyzer.Trace.Tracer())
+        self.worker.submit("window_main", {"type": "start_setup", "data": None})
+        self.worker.submit("window_accounting", {"type": "accounting_add_row", "comment": "",
+                                                 "category": "food", "value": -5.0,
+                                                 "date": "2021-06-01"})
+        self.worker.submit("window_report", {"type": "report_query", "start": "2021-06-01",
+                                             "end": "2021-06-30"})
+        self.worker.submit("window_accounting", {"type": "accounting_page", "count": 5})
+        self.worker.start()
+        self.worker.stop()
+        results = [self.worker.results.get_nowait() for _ in range(4)]
+        self.assertEqual(sorted((window, event_type, show)
+                                for window, _, event_type, show in results),
+                         [("window_accounting", "accounting_add_row", True),
+                          ("window_accounting", "accounting_page", True),
+                          ("window_main", "start_setup", True),
+                          ("window_report", "report_query", False)])
+
+    def tearDown(self):
         """Close temporary file after each test."""
         self.dbfile.close()
+
+
+class TestCli(unittest.TestCase):
+    """Command line interface test class, does not need display."""
+
+    def setUp(self):
+        """Create empty db before each test."""
+        self.dbfile = tempfile.NamedTemporaryFile()
+
+    def run_cli(self, *args):
+        """Run command and return its output."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            FinanceAnalyzer.Cli.main(["--db", self.dbfile.name, *args])
+        return output.getvalue()
+
+    def test_0_commands(self):
+        """Check add, query, report and export commands."""
+        self.assertEqual(self.run_cli("add", "lunch", "food", "-12.5", "2021-06-01"), "0\n")
+        self.assertEqual(self.run_cli("add", "salary", "work", "100", "02.06.2021"), "1\n")
+        self.assertEqual(self.run_cli("query", "--count", "2"),
+                         "0\tlunch\tfood\t-12.5\t2021-06-01\n"
+                         "1\tsalary\twork\t100.0\t02.06.2021\n")
+        self.assertEqual(self.run_cli("report", "2021-06-01", "2021-06-30"),
+                         "food\t0.00\t12.50\nwork\t100.00\t0.00\nTotal\t100.00\t12.50\n")
+        with tempfile.NamedTemporaryFile(suffix=".csv") as output:
+            self.assertEqual(self.run_cli("export", output.name), "2\n")
+            self.assertEqual(self.run_cli("import", output.name), "2\n")
+        self.assertEqual(self.run_cli("query", "--start", "3", "--count", "1"),
+                         "3\tsalary\twork\t100.0\t2021-06-02\n")
+        self.assertEqual(self.run_cli("goal", "bike", "300"), "1\n")
+        self.assertEqual(self.run_cli("goals"), "1\tbike\t300.00\t175.00\n")
+        with tempfile.NamedTemporaryFile(suffix=".jsonl") as output:
+            self.assertEqual(self.run_cli("export", output.name, "--category", "food"), "2\n")
+            self.assertEqual(self.run_cli("report", "2021-06-01", "2021-06-30",
+                                          "--output", output.name), "2\n")
+            self.assertEqual(json.loads(output.readline()),
+                             {"category": "food", "income": 0.0, "expenses": 25.0})
+        self.assertEqual(self.run_cli("rate", "EUR", "2021-01-01", "2"), "")
+        self.assertEqual(self.run_cli("add", "hotel", "trip", "-10", "2021-06-05",
+                                      "--currency", "eur"), "4\n")
+        self.assertIn("trip\t0.00\t20.00\n", self.run_cli("report", "2021-06-01", "2021-06-30"))
+
+    def test_1_no_tkinter(self):
+        """Check that command line interface does not import tkinter."""
+        code = "import sys, FinanceAnalyzer.__main__; print('tkinter' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        self.assertEqual(output.stdout, "False\n")
+
+    def test_2_no_numpy(self):
+        """Check that report and goals of ledger in base currency do not import numpy."""
+        self.run_cli("add", "lunch", "food", "-12.5", "2021-06-01")
+        self.run_cli("goal", "bike", "300")
+        code = ("import sys, FinanceAnalyzer.Cli; "
+                f"FinanceAnalyzer.Cli.main(['--db', {self.dbfile.name!r}, *sys.argv[1:]]); "
+                "print('numpy' in sys.modules)")
+        for args in ("report", "2021-06-01", "2021-06-30"), ("goals", ):
+            output = subprocess.run([sys.executable, "-c", code, *args], capture_output=True,
+                                    text=True)
+            self.assertEqual(output.stdout.splitlines()[-1], "False")
+
+    def test_3_import_errors(self):
+        """Check that unreadable statements stop import with message instead of traceback."""
+        with tempfile.TemporaryDirectory() as directory:
+            for name, message in ("missing.csv", "No such file"), ("ledger.xls", "Unsupported"):
+                with self.assertRaises(SystemExit) as context:
+                    self.run_cli("import", f"{directory}/{name}")
+                self.assertIn(message, context.exception.code)
+
+    def tearDown(self):
+        """Close temporary file after each test."""
+        self.dbfile.close()
+
+
+class TestStartup(unittest.TestCase):
+    """Startup time budget test class, does not need display."""
+
+    import_budget = 0.15
+    paint_budget = 0.03
+    draw_budget = 0.1
+    runs = 3
+
+    def test_0_import(self):
+        """Check that GUI modules import within budget and defer modules of later events.
+        Import is timed in fresh interpreters, the best run is compared with budget.
+        """
+        code = ("import sys, time; start = time.perf_counter(); "
+                "import FinanceAnalyzer.Controller; print(time.perf_counter() - start); "
+                "print(sorted({'numpy', 'urllib.request', 'concurrent.futures', "
+                "'tkinter.filedialog'} & set(sys.modules)))")
+        times = []
+        for _ in range(self.runs):
+            output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+            seconds, deferred = output.stdout.splitlines()
+            self.assertEqual(deferred, "[]")
+            times.append(float(seconds))
+        self.assertLess(min(times), self.import_budget)
+
+    def test_1_first_paint(self):
+        """Check that Model prepares first page of large ledger within budget."""
+        with tempfile.NamedTemporaryFile() as dbfile:
+            model = FinanceAnalyzer.Model.Model(lambda w, d: None, dbfile.name)
+            model.create_tables()
+            model.cur.executemany(model.accounting_insert,
+                                  [(i, "lunch", None, -1.0, "2021-06-01", 18779, "")
+                                   for i in range(100000)])
+            model.close()
+            times = []
+            for _ in range(self.runs):
+                results = []
+                start = time.perf_counter()
+                model = FinanceAnalyzer.Model.Model(lambda w, d: results.append((w, d)),
+                                                    dbfile.name)
+                model("window_main", {"type": "start_setup", "data": None})
+                model("window_main", {"type": "theme_setup", "data": None})
+                times.append(time.perf_counter() - start)
+                model.close()
+                self.assertEqual([window for window, _ in results],
+                                 ["window_main", "window_accounting"])
+                self.assertEqual(results[-1][1][0].total, 100000)
+        self.assertLess(min(times), self.paint_budget)